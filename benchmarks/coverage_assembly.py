@@ -0,0 +1,105 @@
+# coding: utf-8
+"""Compare assembly of alpha-shape polygon from triangles.
+
+"all_edges" is the previous approach: all edges of kept triangles are
+polygonized and resulting triangles are merged with unary_union. "boundary"
+is the current one used by passes_coverage.alpha_shape: only edges belonging
+to a single triangle are polygonized.
+
+Every measurement runs make_coverage_geojson in a fresh process and reports
+wall time and growth of peak RSS. Run from repository root:
+
+    python -m benchmarks.coverage_assembly --points 5000 20000
+"""
+
+import argparse
+import resource
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import numpy.typing as npt
+import shapely
+import shapely.ops
+from scipy.spatial.qhull import Delaunay  # type: ignore
+
+from mountain_passes_for_nakarte import passes_coverage
+
+POINTS_PER_CLUSTER = 50
+CLUSTER_SIZE_DEGREES = 0.3
+
+
+def unique_edges(simplices: npt.NDArray[np.int_]) -> npt.NDArray[np.int_]:
+    """Edges of triangles in the order and direction of first occurrence."""
+    edges = simplices[:, [0, 1, 1, 2, 2, 0]].reshape(-1, 2)
+    keys = np.sort(edges, axis=1)
+    _, first_occurrences = np.unique(keys, axis=0, return_index=True)
+    return edges[np.sort(first_occurrences)]
+
+
+def polygonize_alpha_shape(
+    points: npt.NDArray[np.float64] | list[tuple[float, float]], alpha: float
+) -> shapely.geometry.base.BaseGeometry:
+    if len(points) < 4:
+        return shapely.geometry.MultiPoint(list(points)).convex_hull
+    coords = np.asarray(points, dtype=np.float64)
+    tri = Delaunay(coords)
+    mask = passes_coverage.filter_triangles(coords, tri.simplices, alpha)
+    edge_points = coords[unique_edges(tri.simplices[mask])]
+    m = shapely.geometry.MultiLineString(list(edge_points))
+    triangles = list(shapely.ops.polygonize(m))
+    return shapely.ops.unary_union(triangles)
+
+
+ASSEMBLY_METHODS = {
+    "all_edges": polygonize_alpha_shape,
+    "boundary": passes_coverage.alpha_shape,
+}
+
+
+def make_points(count: int, seed: int) -> list[tuple[float, float]]:
+    """Clustered points in Eurasia, like mountain passes."""
+    rng = np.random.default_rng(seed)
+    clusters_count = max(count // POINTS_PER_CLUSTER, 1)
+    centers = np.column_stack(
+        [rng.uniform(0, 140, clusters_count), rng.uniform(30, 65, clusters_count)]
+    )
+    points = centers[rng.integers(0, clusters_count, count)] + rng.normal(
+        0, CLUSTER_SIZE_DEGREES, (count, 2)
+    )
+    return [(float(lon), float(lat)) for lon, lat in points]
+
+
+def run(method: str, points: list[tuple[float, float]]) -> tuple[float, int]:
+    # Running in a separate process, patching does not affect the caller.
+    passes_coverage.alpha_shape = ASSEMBLY_METHODS[method]
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    passes_coverage.make_coverage_geojson(points)
+    duration = time.perf_counter() - start
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return duration, rss_after - rss_before
+
+
+def measure(method: str, points: list[tuple[float, float]]) -> tuple[float, int]:
+    with ProcessPoolExecutor(max_workers=1) as executor:
+        return executor.submit(run, method, points).result()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--points", type=int, nargs="+", default=[5000, 20000, 50000])
+    parser.add_argument("--seed", type=int, default=1)
+    conf = parser.parse_args()
+    print(f"{'points':>8} {'method':>10} {'time, s':>8} {'peak RSS +, MB':>15}")
+    for count in conf.points:
+        points = make_points(count, conf.seed)
+        for method in ASSEMBLY_METHODS:
+            duration, rss_growth = measure(method, points)
+            print(
+                f"{count:>8} {method:>10} {duration:>8.2f} {rss_growth / 1024:>15.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
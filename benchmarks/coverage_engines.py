@@ -0,0 +1,68 @@
+# coding: utf-8
+"""Compare coverage engines by speed and by area of resulting coverage.
+
+Area of every coverage and area of its symmetric difference with coverage of
+"global" engine are given relative to area of the latter. Every measurement
+runs make_coverage in a fresh process and reports wall time and growth of
+peak RSS. Run from repository root:
+
+    python -m benchmarks.coverage_engines --points 20000 200000
+"""
+
+import argparse
+import resource
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import shapely
+
+from benchmarks.coverage_assembly import make_points
+from mountain_passes_for_nakarte import passes_coverage
+
+
+def run(
+    engine: str, points: list[tuple[float, float]]
+) -> tuple[float, int, shapely.geometry.MultiPolygon]:
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    coverage = passes_coverage.make_coverage(points, engine=engine)
+    duration = time.perf_counter() - start
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return duration, rss_after - rss_before, coverage
+
+
+def measure(
+    engine: str, points: list[tuple[float, float]]
+) -> tuple[float, int, shapely.geometry.MultiPolygon]:
+    with ProcessPoolExecutor(max_workers=1) as executor:
+        return executor.submit(run, engine, points).result()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--points", type=int, nargs="+", default=[20000, 200000])
+    parser.add_argument("--seed", type=int, default=1)
+    conf = parser.parse_args()
+    print(
+        f"{'points':>8} {'engine':>8} {'time, s':>8} {'peak RSS +, MB':>15} "
+        f"{'area':>6} {'sym. diff.':>10}"
+    )
+    for count in conf.points:
+        points = make_points(count, conf.seed)
+        reference = None
+        for engine in passes_coverage.COVERAGE_ENGINES:
+            duration, rss_growth, parts = measure(engine, points)
+            # Circles around single points can overlap polygons of coverage.
+            coverage = shapely.union_all(shapely.get_parts(parts))
+            if reference is None:
+                reference = coverage
+            area = coverage.area / reference.area
+            difference = coverage.symmetric_difference(reference).area / reference.area
+            print(
+                f"{count:>8} {engine:>8} {duration:>8.2f} {rss_growth / 1024:>15.1f} "
+                f"{area:>6.3f} {difference:>10.3f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+# coding: utf-8
+"""Compare passes file with its columnar form by size and parse time.
+
+Columnar form is built from the given passes file, checked to decode back to
+the same data and both are measured raw and gzipped. Parse time is the time of
+json.loads and, for columnar form, of decoding too. Run from repository root:
+
+    python -m benchmarks.passes_formats passes.json --precision 6
+"""
+
+import argparse
+import gzip
+import io
+import json
+import time
+from typing import Any, Callable
+
+from mountain_passes_for_nakarte.columnar_passes import decode_passes, encode_passes
+from mountain_passes_for_nakarte.utils import write_json_with_float_precision
+
+REPEATS = 10
+
+
+def parse_time(parse: Callable[[bytes], Any], data: bytes) -> float:
+    start = time.perf_counter()
+    for _ in range(REPEATS):
+        parse(data)
+    return (time.perf_counter() - start) / REPEATS
+
+
+def load_columnar(data: bytes) -> Any:
+    return decode_passes(json.loads(data))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("passes_file")
+    parser.add_argument("--precision", type=int, default=6)
+    conf = parser.parse_args()
+    with open(conf.passes_file, "rb") as f:
+        passes_json = f.read()
+    passes_data = json.loads(passes_json)
+    output = io.StringIO()
+    write_json_with_float_precision(
+        encode_passes(passes_data, conf.precision),
+        output,
+        precision=conf.precision,
+        ensure_ascii=False,
+    )
+    columnar_json = output.getvalue().encode()
+    assert decode_passes(json.loads(columnar_json)) == passes_data
+    print(f"{'format':>8} {'bytes':>10} {'gzipped':>10} {'parse, ms':>10}")
+    formats: list[tuple[str, bytes, Callable[[bytes], Any]]] = [
+        ("json", passes_json, json.loads),
+        ("columnar", columnar_json, load_columnar),
+    ]
+    for name, data, parse in formats:
+        print(
+            f"{name:>8} {len(data):>10} {len(gzip.compress(data)):>10} "
+            f"{parse_time(parse, data) * 1000:>10.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
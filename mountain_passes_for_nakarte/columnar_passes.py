@@ -0,0 +1,144 @@
+# coding: utf-8
+"""Columnar form of passes file.
+
+Passes are stored as columns, one per field. Strings are replaced with
+indexes in a dictionary of column ordered by frequency. Lists of records,
+like comments, are columns of all their records with list lengths. Coordinates
+are integers in units of the last decimal digit, every pass relative to the
+previous one. Missing fields are -1 in indexes and lengths and null
+elsewhere, so fields must not be null themselves.
+"""
+
+from collections import Counter
+from typing import Any, Mapping, Sequence
+
+import numpy as np
+
+FORMAT = "columnar_passes"
+VERSION = 1
+COORDINATES_FIELD = "latlon"
+
+
+# Value of field absent in record
+MISSING = object()
+
+
+def _string_dictionary(strings: Sequence[str]) -> tuple[list[str], dict[str, int]]:
+    dictionary = [s for s, _ in Counter(strings).most_common()]
+    return dictionary, {s: i for i, s in enumerate(dictionary)}
+
+
+def _encode_coordinates(values: Sequence[Any], precision: int) -> dict[str, Any]:
+    # Values are rounded first to have the same decimals as passes file.
+    quantized = np.round(
+        np.round(np.array(values, dtype=np.float64), precision) * 10**precision
+    ).astype(np.int64)
+    deltas = np.diff(quantized, axis=0, prepend=[[0, 0]])
+    return {
+        "type": "coordinates",
+        "precision": precision,
+        "deltas": deltas.ravel().tolist(),
+    }
+
+
+def _encode_column(values: list[Any], precision: int) -> dict[str, Any]:
+    present = [v for v in values if v is not MISSING]
+    if all(isinstance(v, str) for v in present):
+        dictionary, numbers = _string_dictionary(present)
+        return {
+            "type": "string",
+            "dictionary": dictionary,
+            "indexes": [-1 if v is MISSING else numbers[v] for v in values],
+        }
+    if all(isinstance(v, (list, tuple)) for v in present):
+        items = [item for v in present for item in v]
+        lengths = [-1 if v is MISSING else len(v) for v in values]
+        if all(isinstance(item, str) for item in items):
+            dictionary, numbers = _string_dictionary(items)
+            return {
+                "type": "string_list",
+                "dictionary": dictionary,
+                "lengths": lengths,
+                "indexes": [numbers[item] for item in items],
+            }
+        if all(isinstance(item, Mapping) for item in items):
+            return {
+                "type": "record_list",
+                "lengths": lengths,
+                "records": encode_records(items, precision),
+            }
+    return {"type": "plain", "values": [None if v is MISSING else v for v in values]}
+
+
+def encode_records(
+    records: Sequence[Mapping[str, Any]], precision: int
+) -> dict[str, Any]:
+    """Columns of records, coordinates are rounded to precision."""
+    fields = list(dict.fromkeys(key for record in records for key in record))
+    columns = {}
+    for field in fields:
+        values = [record.get(field, MISSING) for record in records]
+        if field == COORDINATES_FIELD and MISSING not in values:
+            columns[field] = _encode_coordinates(values, precision)
+        else:
+            columns[field] = _encode_column(values, precision)
+    return {"count": len(records), "columns": columns}
+
+
+def _decode_column(column: Mapping[str, Any], count: int) -> list[Any]:
+    column_type = column["type"]
+    if column_type == "coordinates":
+        scale = 10 ** column["precision"]
+        coordinates = np.cumsum(np.reshape(column["deltas"], (-1, 2)), axis=0) / scale
+        return coordinates.tolist()  # type: ignore[no-any-return]
+    if column_type == "string":
+        dictionary = column["dictionary"]
+        return [MISSING if i < 0 else dictionary[i] for i in column["indexes"]]
+    if column_type == "plain":
+        return [MISSING if v is None else v for v in column["values"]]
+    if column_type == "string_list":
+        dictionary = column["dictionary"]
+        items = [dictionary[i] for i in column["indexes"]]
+    elif column_type == "record_list":
+        items = decode_records(column["records"])
+    else:
+        raise ValueError(f"Unknown column type {column_type!r}")
+    values: list[Any] = []
+    start = 0
+    for length in column["lengths"]:
+        if length < 0:
+            values.append(MISSING)
+        else:
+            values.append(items[start : start + length])
+            start += length
+    assert len(values) == count
+    return values
+
+
+def decode_records(data: Mapping[str, Any]) -> list[dict[str, Any]]:
+    count = data["count"]
+    records: list[dict[str, Any]] = [{} for _ in range(count)]
+    for field, column in data["columns"].items():
+        for record, value in zip(records, _decode_column(column, count)):
+            if value is not MISSING:
+                record[field] = value
+    return records
+
+
+def encode_passes(passes_data: Mapping[str, Any], precision: int) -> dict[str, Any]:
+    """Columnar form of passes file data, other top-level fields are kept as is."""
+    result: dict[str, Any] = {"format": FORMAT, "version": VERSION}
+    for key, value in passes_data.items():
+        result[key] = encode_records(value, precision) if key == "passes" else value
+    return result
+
+
+def decode_passes(data: Mapping[str, Any]) -> dict[str, Any]:
+    """Reference decoder, result equals data of passes file as loaded from JSON."""
+    if data.get("format") != FORMAT or data.get("version") != VERSION:
+        raise ValueError("Not a columnar passes file of supported version")
+    return {
+        key: decode_records(value) if key == "passes" else value
+        for key, value in data.items()
+        if key not in ("format", "version")
+    }
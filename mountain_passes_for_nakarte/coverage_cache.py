@@ -0,0 +1,99 @@
+# coding: utf-8
+"""Results of coverage building kept between runs.
+
+Directory contains coverage geometries in WKB, one file per set of points,
+and alpha-shape triangles of tiles of tiled engine in a single NPZ file.
+Entries not used in a run are deleted when cache is saved. Tiles are kept
+as is if no tiles were looked up, e.g. when coverage itself was in cache.
+"""
+
+import hashlib
+import io
+from pathlib import Path
+
+import numpy as np
+import numpy.typing as npt
+import shapely
+
+from .utils import write_bytes_atomic
+
+# Changes when algorithms change results for the same keys
+CACHE_VERSION = 2
+TILES_FILENAME = "tiles.npz"
+
+
+def make_key(*parts: str | float | npt.NDArray[np.generic]) -> str:
+    digest = hashlib.sha256(str(CACHE_VERSION).encode())
+    for part in parts:
+        if isinstance(part, np.ndarray):
+            digest.update(f"{part.dtype}{part.shape}".encode())
+            digest.update(np.ascontiguousarray(part).tobytes())
+        else:
+            digest.update(repr(part).encode())
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class CoverageCache:  # pylint: disable=too-many-instance-attributes
+    def __init__(self, directory: str):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.used_results: set[str] = set()
+        self.previous_tiles = self._load_tiles()
+        self.current_tiles: dict[str, npt.NDArray[np.int_]] = {}
+        self.tiles_used = False
+        self.result_hits = 0
+        self.result_misses = 0
+        self.tile_hits = 0
+        self.tile_misses = 0
+
+    def _load_tiles(self) -> dict[str, npt.NDArray[np.int_]]:
+        try:
+            with np.load(self.directory / TILES_FILENAME) as tiles:
+                return {key: tiles[key] for key in tiles.files}
+        except FileNotFoundError:
+            return {}
+
+    def _result_path(self, key: str) -> Path:
+        return self.directory / f"result_{key}.wkb"
+
+    def get_result(self, key: str) -> shapely.geometry.base.BaseGeometry | None:
+        try:
+            data = self._result_path(key).read_bytes()
+        except FileNotFoundError:
+            self.result_misses += 1
+            return None
+        self.used_results.add(key)
+        self.result_hits += 1
+        return shapely.from_wkb(data)
+
+    def add_result(
+        self, key: str, geometry: shapely.geometry.base.BaseGeometry
+    ) -> None:
+        write_bytes_atomic(self._result_path(key), shapely.to_wkb(geometry))
+        self.used_results.add(key)
+
+    def get_tile(self, key: str) -> npt.NDArray[np.int_] | None:
+        self.tiles_used = True
+        simplices = self.current_tiles.get(key)
+        if simplices is None:
+            simplices = self.previous_tiles.pop(key, None)
+        if simplices is None:
+            self.tile_misses += 1
+            return None
+        self.current_tiles[key] = simplices
+        self.tile_hits += 1
+        return simplices
+
+    def add_tile(self, key: str, simplices: npt.NDArray[np.int_]) -> None:
+        self.current_tiles[key] = simplices
+
+    def save(self) -> None:
+        for path in self.directory.glob("result_*.wkb"):
+            if path.stem.removeprefix("result_") not in self.used_results:
+                path.unlink()
+        if not self.tiles_used:
+            return
+        buffer = io.BytesIO()
+        np.savez(buffer, **self.current_tiles)  # type: ignore[arg-type]
+        write_bytes_atomic(self.directory / TILES_FILENAME, buffer.getvalue())
@@ -1,21 +1,95 @@
+import json
 import math
-from typing import Any, cast
+from typing import (
+    Any,
+    Iterable,
+    Iterator,
+    NamedTuple,
+    Sequence,
+    cast,
+)
 
 import numpy as np
 import numpy.typing as npt
 import shapely
-import shapely.ops
-from scipy.spatial.qhull import Delaunay  # type: ignore
+from scipy.ndimage import (  # type: ignore
+    distance_transform_edt,
+    label,
+)
+from scipy.spatial.qhull import Delaunay, QhullError  # type: ignore
 
-from .webmercator import web_mercator_to_wgs84, wgs84_to_web_mercator
+from .coverage_cache import CoverageCache, make_key
+from .utils import map_tasks
+from .webmercator import (
+    R,
+    web_mercator_to_wgs84_array,
+    wgs84_to_web_mercator_array,
+)
 
 CONCAVE_ALPHA_METERS = 20000
 BUFFER_METERS = 1000
 SIMPLIFY_METERS = 1000
+# Size of tile of Web Mercator zoom level 6
+TILE_SIZE_METERS = 2 * R / 2**6
+COVERAGE_ENGINES = ("global", "tiled", "raster")
+# Cell of raster engine, about 2.4 km
+RASTER_CELL_METERS = TILE_SIZE_METERS / 256
+# Zoom bands of coverage pyramid as (min zoom, simplification tolerance in
+# meters). Tolerance is less than size of pixel at the last zoom of the band.
+COVERAGE_PYRAMID_BANDS = ((0, 16000), (3, 4000), (6, 1000), (9, 250))
 
+# Arguments of _tile_alpha_triangles()
+TileTask = tuple[npt.NDArray[np.float64], npt.NDArray[np.int_], range, float]
 
-def alpha_shape(  # pylint: disable=too-many-locals
-    points: list[tuple[float, float]], alpha: float
+
+def filter_triangles(
+    coords: npt.NDArray[np.float64], simplices: npt.NDArray[np.int_], alpha: float
+) -> npt.NDArray[np.bool_]:
+    """Mask of triangles with circumradius less than 1 / alpha.
+
+    Degenerate triangles with zero area have infinite circumradius and are
+    never kept.
+    """
+    pa, pb, pc = (coords[simplices[:, i]] for i in range(3))
+    # Lengths of sides of triangles
+    a = np.sqrt((pa[:, 0] - pb[:, 0]) ** 2 + (pa[:, 1] - pb[:, 1]) ** 2)
+    b = np.sqrt((pb[:, 0] - pc[:, 0]) ** 2 + (pb[:, 1] - pc[:, 1]) ** 2)
+    c = np.sqrt((pc[:, 0] - pa[:, 0]) ** 2 + (pc[:, 1] - pa[:, 1]) ** 2)
+    # Semiperimeter of triangles
+    s = (a + b + c) / 2.0
+    # Squared area of triangles by Heron's formula, can be slightly negative
+    # for degenerate triangles due to rounding.
+    area_squared = s * (s - a) * (s - b) * (s - c)
+    non_degenerate = area_squared > 0
+    circum_r = np.full(len(simplices), np.inf)
+    circum_r[non_degenerate] = (a * b * c)[non_degenerate] / (
+        4.0 * np.sqrt(area_squared[non_degenerate])
+    )
+    return circum_r < 1.0 / alpha
+
+
+def boundary_edges(simplices: npt.NDArray[np.int_]) -> npt.NDArray[np.int_]:
+    """Edges belonging to exactly one triangle, as pairs of indices of points.
+
+    These are edges of outer boundaries of groups of triangles and of holes in
+    them.
+    """
+    edges = np.sort(simplices[:, [0, 1, 1, 2, 2, 0]].reshape(-1, 2), axis=1)
+    if edges.size == 0:
+        return edges
+    # Sorting edges encoded as single integers is much faster than np.unique
+    # over rows.
+    points_count = int(edges.max()) + 1
+    keys = edges[:, 0].astype(np.int64) * points_count + edges[:, 1]
+    unique_keys, counts = np.unique(keys, return_counts=True)
+    boundary_keys = unique_keys[counts == 1]
+    return np.column_stack(
+        [boundary_keys // points_count, boundary_keys % points_count]
+    ).astype(simplices.dtype)
+
+
+def alpha_shape(
+    points: npt.NDArray[np.float64] | list[tuple[float, float]], alpha: float
 ) -> shapely.geometry.base.BaseGeometry:
     """
     Compute the alpha shape (concave hull) of a set
@@ -31,69 +105,528 @@ def alpha_shape(  # pylint: disable=too-many-locals
         # in computing an alpha shape.
         return shapely.geometry.MultiPoint(list(points)).convex_hull
 
-    def add_edge(
-        edges: set[tuple[float, float]],
-        edge_points: list[npt.NDArray[np.float64]],
-        coords: npt.NDArray[np.float64],
-        i: int,
-        j: int,
-    ) -> None:
-        """
-        Add a line between the i-th and j-th points,
-        if not in the list already
-        """
-        if (i, j) in edges or (j, i) in edges:
-            # already added
-            return
-        edges.add((i, j))
-        edge_points.append(coords[[i, j]])
-
-    coords: npt.NDArray[np.float64] = np.array(points)
-    tri = Delaunay(coords)
-    edges: set[tuple[float, float]] = set()
-    edge_points: list[npt.NDArray[np.float64]] = []
-    # loop over triangles:
-    # ia, ib, ic = indices of corner points of the
-    # triangle
-    for ia, ib, ic in tri.simplices:
-        pa = coords[ia]
-        pb = coords[ib]
-        pc = coords[ic]
-        # Lengths of sides of triangle
-        a = math.sqrt((pa[0] - pb[0]) ** 2 + (pa[1] - pb[1]) ** 2)
-        b = math.sqrt((pb[0] - pc[0]) ** 2 + (pb[1] - pc[1]) ** 2)
-        c = math.sqrt((pc[0] - pa[0]) ** 2 + (pc[1] - pa[1]) ** 2)
-        # Semiperimeter of triangle
-        s = (a + b + c) / 2.0
-        # Area of triangle by Heron's formula
-        area = math.sqrt(s * (s - a) * (s - b) * (s - c))
-        circum_r = a * b * c / (4.0 * area)
-        # Here's the radius filter.
-        # print circum_r
-        if circum_r < 1.0 / alpha:
-            add_edge(edges, edge_points, coords, ia, ib)
-            add_edge(edges, edge_points, coords, ib, ic)
-            add_edge(edges, edge_points, coords, ic, ia)
-    m = shapely.geometry.MultiLineString(edge_points)
-    triangles = list(shapely.ops.polygonize(m))
-    return shapely.ops.unary_union(triangles)
-
-
-def make_coverage_geojson(points: list[tuple[float, float]]) -> Any:
-    points_projected = [wgs84_to_web_mercator(*point) for point in points]
-    coverage = alpha_shape(points_projected, 1.0 / CONCAVE_ALPHA_METERS)
-    coverage = coverage.buffer(BUFFER_METERS)
-    coverage = coverage.simplify(SIMPLIFY_METERS)
-    assert coverage.geom_type == "MultiPolygon"
-    coverage = cast(shapely.geometry.MultiPolygon, coverage)
+    coords = np.asarray(points, dtype=np.float64)
+    try:
+        tri = Delaunay(coords)
+    except QhullError:
+        # All points are on a line or coincide, hull is a line or a point
+        # that becomes polygon when buffered.
+        return shapely.geometry.MultiPoint(coords).convex_hull
+    simplices = tri.simplices[filter_triangles(coords, tri.simplices, alpha)]
+    return triangles_to_polygons(coords, simplices)
 
-    single_points = shapely.geometry.MultiPoint(points_projected).difference(coverage)
-    single_points_coverage = cast(
-        shapely.geometry.MultiPolygon, single_points.buffer(1)
+
+def triangles_to_polygons(
+    coords: npt.NDArray[np.float64], simplices: npt.NDArray[np.int_]
+) -> shapely.geometry.base.BaseGeometry:
+    """Union of triangles with areas enclosed by them filled."""
+    # Polygonizing only boundary edges gives same faces as polygonizing edges
+    # of all triangles, except that faces are not split into triangles.
+    boundary = cast(
+        npt.NDArray[np.object_], shapely.linestrings(coords[boundary_edges(simplices)])
+    )
+    faces = shapely.get_parts(shapely.polygonize(boundary))
+    return shapely.union_all(faces)
+
+
+def _tile_alpha_triangles(
+    coords: npt.NDArray[np.float64],
+    indexes: npt.NDArray[np.int_],
+    owned_indexes: range,
+    alpha: float,
+) -> npt.NDArray[np.int_]:
+    """Alpha-shape triangles owned by tile, as triples of indexes in coords.
+
+    coords are points of tile with its margin, indexes are their global
+    indexes. Triangle is owned by tile containing its vertex with the smallest
+    global index.
+    """
+    if len(coords) < 3:
+        return np.empty((0, 3), dtype=np.int_)
+    try:
+        tri = Delaunay(coords)
+    except QhullError:
+        # All points are on a line
+        return np.empty((0, 3), dtype=np.int_)
+    simplices = tri.simplices[filter_triangles(coords, tri.simplices, alpha)]
+    owners = indexes[simplices].min(axis=1)
+    is_owned = (owners >= owned_indexes.start) & (owners < owned_indexes.stop)
+    return cast(npt.NDArray[np.int_], simplices[is_owned])
+
+
+def _tiles_alpha_triangles(
+    tasks: dict[tuple[int, int], TileTask],
+    tile_size: float,
+    jobs: int,
+    cache: CoverageCache | None,
+) -> dict[tuple[int, int], npt.NDArray[np.int_]]:
+    """Triangles of every tile as indexes of points of its task."""
+    triangles = {}
+    keys = {}
+    if cache is not None:
+        for tile, (tile_coords, _, _, alpha) in tasks.items():
+            keys[tile] = make_key("tile", alpha, tile_size, *tile, tile_coords)
+            if (tile_triangles := cache.get_tile(keys[tile])) is not None:
+                triangles[tile] = tile_triangles
+    built_triangles = map_tasks(
+        _tile_alpha_triangles,
+        {tile: task for tile, task in tasks.items() if tile not in triangles},
+        jobs,
+    )
+    if cache is not None:
+        for tile, tile_triangles in built_triangles.items():
+            cache.add_tile(keys[tile], tile_triangles)
+    triangles.update(built_triangles)
+    return triangles
+
+
+def _split_to_tiles(
+    coords: npt.NDArray[np.float64], tile_size: float
+) -> tuple[npt.NDArray[np.float64], dict[tuple[int, int], range]]:
+    """Sort points by tiles, return them with ranges of indexes of every tile."""
+    tiles = np.floor((coords + R) / tile_size).astype(np.int64)
+    order = np.lexsort((tiles[:, 1], tiles[:, 0]))
+    tiles = tiles[order]
+    tile_keys, tile_starts = np.unique(tiles, axis=0, return_index=True)
+    tile_ends = list(tile_starts[1:]) + [len(coords)]
+    tile_ranges = {
+        (int(tx), int(ty)): range(int(start), int(end))
+        for (tx, ty), start, end in zip(tile_keys, tile_starts, tile_ends)
+    }
+    return coords[order], tile_ranges
+
+
+def tiled_alpha_shape(
+    points: npt.NDArray[np.float64],
+    alpha: float,
+    tile_size: float = TILE_SIZE_METERS,
+    jobs: int = 1,
+    cache: CoverageCache | None = None,
+) -> shapely.geometry.base.BaseGeometry:
+    """Alpha shape computed by square tiles, tiles are processed in parallel.
+
+    Every tile is triangulated together with points in the margin around it.
+    Triangles kept by alpha shape have circumcircle of diameter less than
+    2 / alpha, so with margin of 2 / alpha such triangles of the tile are the
+    same as in triangulation of all points. Result is the same as of
+    alpha_shape(), memory used by triangulation is bounded by size of tiles.
+
+    Triangles of tile are taken from cache when points of the tile and its
+    margin did not change, so when only a few points move, only tiles around
+    them are triangulated again.
+    """
+    margin = 2.0 / alpha
+    if margin >= tile_size:
+        raise ValueError(f"Tile size {tile_size} is less than margin {margin}")
+    # Duplicate points can be triangulated with different copies in different
+    # tiles.
+    coords = np.unique(np.asarray(points, dtype=np.float64).reshape(-1, 2), axis=0)
+    if len(coords) < 4:
+        return alpha_shape(coords, alpha)
+    coords, tile_ranges = _split_to_tiles(coords, tile_size)
+
+    def tile_task(tile: tuple[int, int], owned_indexes: range) -> TileTask:
+        tx, ty = tile
+        neighbours = [
+            tile_ranges[(tx + dx, ty + dy)]
+            for dx in (-1, 0, 1)
+            for dy in (-1, 0, 1)
+            if (tx + dx, ty + dy) in tile_ranges
+        ]
+        indexes = np.concatenate([np.arange(r.start, r.stop) for r in neighbours])
+        min_x, min_y = np.array(tile) * tile_size - R - margin
+        max_x, max_y = min_x + tile_size + 2 * margin, min_y + tile_size + 2 * margin
+        x = coords[indexes, 0]
+        y = coords[indexes, 1]
+        indexes = indexes[(x >= min_x) & (x <= max_x) & (y >= min_y) & (y <= max_y)]
+        return coords[indexes], indexes, owned_indexes, alpha
+
+    tasks = {tile: tile_task(tile, owned) for tile, owned in tile_ranges.items()}
+    triangles = _tiles_alpha_triangles(tasks, tile_size, jobs, cache)
+    simplices = np.concatenate([tasks[tile][1][triangles[tile]] for tile in tasks])
+    return triangles_to_polygons(coords, simplices)
+
+
+def _edge_runs(
+    edges: npt.NDArray[np.bool_], breaks: npt.NDArray[np.bool_]
+) -> npt.NDArray[np.int_]:
+    """Runs of consecutive unit edges along axis 0, split at break vertices.
+
+    edges[i, j] is edge from vertex (i, j) to (i + 1, j), breaks[i, j] tells
+    if vertex (i, j) has edges along the other axis. Returns segments as
+    pairs of first and end vertices.
+    """
+    padded = np.pad(edges, ((1, 1), (0, 0)))
+    is_start = padded[1:-1] & (~padded[:-2] | breaks[:-1])
+    is_end = padded[1:-1] & (~padded[2:] | breaks[1:])
+    lines, starts = np.nonzero(is_start.T)
+    _, ends = np.nonzero(is_end.T)
+    return np.stack(
+        [np.column_stack([starts, lines]), np.column_stack([ends + 1, lines])], axis=1
+    )
+
+
+def _fill_holes(mask: npt.NDArray[np.bool_]) -> npt.NDArray[np.bool_]:
+    """Mask with areas not connected to its border added."""
+    background, _ = label(~mask)
+    border_labels = np.unique(
+        np.concatenate([background[[0, -1], :].ravel(), background[:, [0, -1]].ravel()])
+    )
+    return ~np.isin(background, border_labels[border_labels != 0])
+
+
+def _cells_to_polygons(
+    mask: npt.NDArray[np.bool_], first_cell: npt.NDArray[np.int64], cell_size: float
+) -> shapely.geometry.base.BaseGeometry:
+    """Polygons of cells of mask, first_cell is index of mask[0, 0] in grid.
+
+    Boundary of mask is polygonized, like boundary edges of alpha-shape
+    triangles. Holes are filled. Consecutive edges on straight lines are
+    merged except where other edges join them, so that lines stay noded.
+    """
+    padded = np.pad(_fill_holes(mask), 1)
+    # x_edges[x, y] is edge from vertex (x, y) to (x + 1, y), y_edges similarly
+    x_edges = padded[1:-1, 1:] != padded[1:-1, :-1]
+    y_edges = padded[1:, 1:-1] != padded[:-1, 1:-1]
+    has_x_edges = np.pad(x_edges, ((0, 1), (0, 0))) | np.pad(x_edges, ((1, 0), (0, 0)))
+    has_y_edges = np.pad(y_edges, ((0, 0), (0, 1))) | np.pad(y_edges, ((0, 0), (1, 0)))
+    # Columns of runs are along y for x edges and along x for y edges.
+    segments = np.concatenate(
+        [
+            _edge_runs(x_edges, has_y_edges),
+            _edge_runs(y_edges.T, has_x_edges.T)[:, :, ::-1],
+        ]
+    )
+    lines = cast(
+        npt.NDArray[np.object_],
+        shapely.linestrings((segments + first_cell) * cell_size - R),
+    )
+    return shapely.geometry.MultiPolygon(
+        list(shapely.get_parts(shapely.polygonize(lines)))
+    )
+
+
+def raster_coverage(
+    points: npt.NDArray[np.float64],
+    radius: float = CONCAVE_ALPHA_METERS,
+    buffer: float = BUFFER_METERS,
+    cell_size: float = RASTER_CELL_METERS,
+) -> shapely.geometry.base.BaseGeometry:
+    """Approximate buffered alpha shape of points built on raster.
+
+    Bounding box of points is rasterized once, mask is closed by radius and
+    dilated by buffer using distance transform, boundary of cells is
+    polygonized once. Memory grows with area of bounding box, not with
+    number of points.
+    """
+    coords = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    if len(coords) == 0:
+        return shapely.geometry.MultiPolygon()
+    cells = np.floor((coords + R) / cell_size).astype(np.int64)
+    # Room for dilation around points
+    dilation = math.ceil((radius + buffer) / cell_size) + 1
+    first_cell = cells.min(axis=0) - dilation
+    mask = np.zeros(cells.max(axis=0) - first_cell + dilation + 1, dtype=np.bool_)
+    mask[cells[:, 0] - first_cell[0], cells[:, 1] - first_cell[1]] = True
+    # Morphological closing by radius fills gaps between points narrower than
+    # 2 * radius like alpha shape does, extra dilation makes buffer.
+    distances = distance_transform_edt(~mask, sampling=cell_size)
+    mask = distances <= radius + buffer
+    del distances
+    mask = distance_transform_edt(mask, sampling=cell_size) > radius
+    return _cells_to_polygons(mask, first_cell, cell_size)
+
+
+def _as_multipolygon(
+    geometry: shapely.geometry.base.BaseGeometry,
+) -> shapely.geometry.MultiPolygon:
+    """Polygonal parts of geometry as MultiPolygon, possibly empty."""
+    if geometry.geom_type == "MultiPolygon":
+        return cast(shapely.geometry.MultiPolygon, geometry)
+    polygons = [
+        part
+        for part in shapely.get_parts(geometry)
+        if part.geom_type == "Polygon" and not part.is_empty
+    ]
+    return shapely.geometry.MultiPolygon(polygons)
+
+
+def project_points(points: npt.ArrayLike) -> npt.NDArray[np.float64]:
+    return wgs84_to_web_mercator_array(
+        np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    )
+
+
+def coverage_cache_key(points_projected: npt.NDArray[np.float64], engine: str) -> str:
+    return make_key(
+        "coverage",
+        engine,
+        CONCAVE_ALPHA_METERS,
+        BUFFER_METERS,
+        SIMPLIFY_METERS,
+        points_projected,
     )
-    assert single_points_coverage.geom_type == "MultiPolygon"
-    coverage = shapely.geometry.MultiPolygon(
+
+
+def make_coverage(
+    points: npt.ArrayLike,
+    engine: str = "global",
+    jobs: int = 1,
+    cache: CoverageCache | None = None,
+) -> shapely.geometry.MultiPolygon:
+    """Coverage of points given as (lon, lat) pairs, in Web Mercator.
+
+    Engine "tiled" computes alpha shape by tiles in jobs processes, engine
+    "raster" approximates buffered alpha shape on grid. With cache coverage of
+    the same points is built only once.
+    """
+    points_projected = project_points(points)
+    if cache is None:
+        return make_projected_coverage(points_projected, engine, jobs)
+    key = coverage_cache_key(points_projected, engine)
+    if (coverage := cache.get_result(key)) is not None:
+        return _as_multipolygon(coverage)
+    coverage = make_projected_coverage(points_projected, engine, jobs, cache)
+    cache.add_result(key, coverage)
+    return coverage
+
+
+def make_projected_coverage(
+    points_projected: npt.NDArray[np.float64],
+    engine: str = "global",
+    jobs: int = 1,
+    cache: CoverageCache | None = None,
+) -> shapely.geometry.MultiPolygon:
+    shape = _buffered_alpha_shape(points_projected, engine, jobs, cache)
+    return _finish_coverage(shape, points_projected, engine)
+
+
+def _finish_coverage(
+    shape: shapely.geometry.base.BaseGeometry,
+    points_projected: npt.NDArray[np.float64],
+    engine: str,
+) -> shapely.geometry.MultiPolygon:
+    if engine == "raster":
+        # Raster cells are larger than simplification tolerance and cells of
+        # points are never removed by closing, so there is nothing to do.
+        return _as_multipolygon(shape)
+    return _with_single_points(shape.simplify(SIMPLIFY_METERS), points_projected)
+
+
+def _buffered_alpha_shape(
+    points_projected: npt.NDArray[np.float64],
+    engine: str,
+    jobs: int,
+    cache: CoverageCache | None,
+) -> shapely.geometry.base.BaseGeometry:
+    alpha = 1.0 / CONCAVE_ALPHA_METERS
+    if engine == "global":
+        coverage = alpha_shape(points_projected, alpha)
+    elif engine == "tiled":
+        coverage = tiled_alpha_shape(points_projected, alpha, jobs=jobs, cache=cache)
+    elif engine == "raster":
+        # Raster is closed and buffered at once.
+        return raster_coverage(points_projected)
+    else:
+        raise ValueError(f"Unknown coverage engine {engine!r}")
+    return coverage.buffer(BUFFER_METERS)
+
+
+def _with_single_points(
+    shape: shapely.geometry.base.BaseGeometry,
+    points_projected: npt.NDArray[np.float64],
+) -> shapely.geometry.MultiPolygon:
+    """Add small circles around points not covered by simplified shape."""
+    coverage = _as_multipolygon(shape)
+    single_points = shapely.geometry.MultiPoint(points_projected).difference(coverage)
+    single_points_coverage = _as_multipolygon(single_points.buffer(1))
+    return shapely.geometry.MultiPolygon(
         list(coverage.geoms) + list(single_points_coverage.geoms)
     )
-    coverage = shapely.ops.transform(web_mercator_to_wgs84, coverage)  # type: ignore[arg-type]
-    return coverage.__geo_interface__
+
+
+class CoveragePyramid(NamedTuple):
+    coverage: shapely.geometry.MultiPolygon
+    # Coverages simplified for zoom bands, by min zoom of band
+    bands: dict[int, shapely.geometry.MultiPolygon]
+
+
+def _pyramid_bands(
+    shape: shapely.geometry.base.BaseGeometry,
+    points_projected: npt.NDArray[np.float64],
+) -> dict[int, shapely.geometry.MultiPolygon]:
+    # Points outside of alpha shape are marked in bands with squares, circles
+    # of single points would have more vertices than simplification saves.
+    # Points cut off from shape by simplification are not marked.
+    shapely.prepare(shape)
+    is_single = ~shapely.contains_xy(shape, *points_projected.T)
+    single_points = _as_multipolygon(
+        shapely.geometry.MultiPoint(points_projected[is_single]).buffer(1, quad_segs=1)
+    )
+    bands = {}
+    # Every band is simplified from full shape, so that its error is within
+    # its own tolerance.
+    for min_zoom, tolerance in sorted(COVERAGE_PYRAMID_BANDS):
+        simplified = shape.simplify(tolerance)
+        bands[min_zoom] = shapely.geometry.MultiPolygon(
+            list(_as_multipolygon(simplified).geoms) + list(single_points.geoms)
+        )
+    return bands
+
+
+def make_coverage_pyramid(
+    points: npt.ArrayLike,
+    engine: str = "global",
+    jobs: int = 1,
+    cache: CoverageCache | None = None,
+) -> CoveragePyramid:
+    """Coverage as make_coverage() returns and its versions for zoom bands.
+
+    Alpha shape is built once and every band is simplified from it.
+    """
+    points_projected = project_points(points)
+    key = make_key(
+        "pyramid",
+        engine,
+        CONCAVE_ALPHA_METERS,
+        BUFFER_METERS,
+        SIMPLIFY_METERS,
+        repr(COVERAGE_PYRAMID_BANDS),
+        points_projected,
+    )
+    if cache is not None and (collection := cache.get_result(key)) is not None:
+        coverage, *cached_bands = map(_as_multipolygon, shapely.get_parts(collection))
+        min_zooms = sorted(min_zoom for min_zoom, _ in COVERAGE_PYRAMID_BANDS)
+        return CoveragePyramid(
+            coverage, dict(zip(min_zooms, cached_bands, strict=True))
+        )
+    shape = _buffered_alpha_shape(points_projected, engine, jobs, cache)
+    coverage = _finish_coverage(shape, points_projected, engine)
+    bands = _pyramid_bands(shape, points_projected)
+    pyramid = CoveragePyramid(coverage, bands)
+    if cache is not None:
+        cache.add_result(
+            key,
+            shapely.geometry.GeometryCollection(
+                [pyramid.coverage, *pyramid.bands.values()]
+            ),
+        )
+    return pyramid
+
+
+def coverage_to_geojson(coverage: shapely.geometry.MultiPolygon) -> Any:
+    return shapely.transform(coverage, web_mercator_to_wgs84_array).__geo_interface__
+
+
+def make_coverage_geojson(
+    points: npt.ArrayLike, engine: str = "global", jobs: int = 1
+) -> Any:
+    """Coverage of points given as (lon, lat) pairs, array of shape (n, 2)."""
+    return coverage_to_geojson(make_coverage(points, engine, jobs))
+
+
+def make_regions_coverage(
+    points: npt.ArrayLike,
+    region_ids: Sequence[str],
+    jobs: int = 1,
+    engine: str = "global",
+    cache: CoverageCache | None = None,
+) -> dict[str, shapely.geometry.MultiPolygon]:
+    """Coverage of points of every region, regions are processed in parallel.
+
+    Regions are in order of their first appearance in region_ids. Only
+    coverages of regions missing in cache are built.
+    """
+    coords = project_points(points)
+    indexes_by_region: dict[str, list[int]] = {}
+    for i, region_id in enumerate(region_ids):
+        indexes_by_region.setdefault(region_id, []).append(i)
+    regions_points = {
+        region_id: coords[indexes] for region_id, indexes in indexes_by_region.items()
+    }
+    regions_coverage = {}
+    keys = {}
+    if cache is not None:
+        for region_id, region_points in regions_points.items():
+            keys[region_id] = coverage_cache_key(region_points, engine)
+            if (coverage := cache.get_result(keys[region_id])) is not None:
+                regions_coverage[region_id] = _as_multipolygon(coverage)
+    # Largest regions are submitted first for better load balancing.
+    built_coverages = map_tasks(
+        make_projected_coverage,
+        {
+            region_id: (regions_points[region_id], engine)
+            for region_id in sorted(
+                regions_points, key=lambda r: len(regions_points[r]), reverse=True
+            )
+            if region_id not in regions_coverage
+        },
+        jobs,
+    )
+    regions_coverage.update(built_coverages)
+    if cache is not None:
+        for region_id, coverage in built_coverages.items():
+            cache.add_result(keys[region_id], coverage)
+    return {region_id: regions_coverage[region_id] for region_id in regions_points}
+
+
+def merge_coverages(
+    coverages: Iterable[shapely.geometry.MultiPolygon],
+) -> shapely.geometry.MultiPolygon:
+    return _as_multipolygon(shapely.union_all(list(coverages)))
+
+
+class CoverageIndex:
+    """Coverage GeoJSON prepared for bulk queries of points.
+
+    Polygons of coverage are indexed with STRtree and prepared, points are
+    given as arrays of (lon, lat) pairs and processed in chunks of
+    QUERY_CHUNK_SIZE points.
+    """
+
+    QUERY_CHUNK_SIZE = 1 << 18
+
+    def __init__(self, geojson: Any):
+        coverage = shapely.transform(
+            shapely.geometry.shape(geojson), wgs84_to_web_mercator_array
+        )
+        self.polygons = shapely.get_parts(coverage)
+        shapely.prepare(self.polygons)
+        self.tree = shapely.STRtree(self.polygons)
+
+    @classmethod
+    def from_file(cls, filename: str) -> "CoverageIndex":
+        with open(filename, encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def _chunks(
+        self, points: npt.ArrayLike
+    ) -> Iterator[tuple[slice, npt.NDArray[np.float64], npt.NDArray[np.object_]]]:
+        coords = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        for start in range(0, len(coords), self.QUERY_CHUNK_SIZE):
+            chunk = slice(start, start + self.QUERY_CHUNK_SIZE)
+            chunk_points = shapely.points(project_points(coords[chunk]))
+            yield chunk, coords[chunk], cast(npt.NDArray[np.object_], chunk_points)
+
+    def contains(self, points: npt.ArrayLike) -> npt.NDArray[np.bool_]:
+        """Mask of points inside coverage or on its boundary."""
+        result = np.zeros(np.asarray(points).size // 2, dtype=np.bool_)
+        for chunk, _, chunk_points in self._chunks(points):
+            point_indexes, _ = self.tree.query(chunk_points, predicate="intersects")
+            result[chunk][point_indexes] = True
+        return result
+
+    def distance(self, points: npt.ArrayLike) -> npt.NDArray[np.float64]:
+        """Distance from points to coverage in meters, zero for points inside.
+
+        Distance in Web Mercator is scaled to the latitude of point, so it is
+        accurate for distances much less than size of the Earth.
+        """
+        result = np.full(np.asarray(points).size // 2, np.inf)
+        for chunk, coords, chunk_points in self._chunks(points):
+            (point_indexes, _), distances = self.tree.query_nearest(
+                chunk_points, return_distance=True, all_matches=False
+            )
+            scale = np.cos(np.radians(coords[point_indexes, 1]))
+            result[chunk][point_indexes] = distances * scale
+        return result
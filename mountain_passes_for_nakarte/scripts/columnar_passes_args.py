@@ -0,0 +1,40 @@
+"""Command line option for writing columnar passes file shared by scripts."""
+
+import argparse
+import os
+import sys
+from typing import Any, Mapping
+
+from mountain_passes_for_nakarte.columnar_passes import encode_passes
+from mountain_passes_for_nakarte.utils import (
+    open_atomic,
+    write_json_with_float_precision,
+)
+
+
+def add_columnar_passes_argument(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--columnar-passes",
+        metavar="FILE",
+        help="also write passes in compact columnar form, see columnar_passes module",
+    )
+
+
+def write_columnar_passes(
+    conf: argparse.Namespace, passes_data: Mapping[str, Any], precision: int
+) -> None:
+    """Write columnar passes if requested and compare size with passes file."""
+    if not conf.columnar_passes:
+        return
+    with open_atomic(conf.columnar_passes, gzip_level=conf.gzip_level) as f:
+        write_json_with_float_precision(
+            encode_passes(passes_data, precision),
+            f,
+            precision=precision,
+            ensure_ascii=False,
+        )
+    print(
+        f"Passes file size: {os.path.getsize(conf.output_passes)} bytes, "
+        f"columnar: {os.path.getsize(conf.columnar_passes)} bytes",
+        file=sys.stderr,
+    )
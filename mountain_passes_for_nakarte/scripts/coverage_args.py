@@ -0,0 +1,149 @@
+"""Command line options for building passes coverage shared by scripts."""
+
+import argparse
+import json
+import os
+import sys
+from pathlib import Path
+from typing import Sequence
+
+import numpy.typing as npt
+import shapely
+
+from mountain_passes_for_nakarte import passes_coverage
+from mountain_passes_for_nakarte.coverage_cache import CoverageCache
+from mountain_passes_for_nakarte.utils import (
+    open_atomic,
+    remove_stale_files,
+    write_json_with_float_precision,
+)
+
+
+def add_jobs_argument(parser: argparse.ArgumentParser, help_text: str) -> None:
+    parser.add_argument("--jobs", type=int, default=1, metavar="N", help=help_text)
+
+
+def add_coverage_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--regions-coverage-dir",
+        help="write coverage of every region to this directory, global coverage "
+        "is merged from coverages of regions",
+    )
+    parser.add_argument(
+        "--coverage-engine",
+        choices=passes_coverage.COVERAGE_ENGINES,
+        default="global",
+        help="build alpha shape from all points at once, by tiles in parallel or "
+        "approximate it on raster of about 2.4 km cells",
+    )
+    parser.add_argument(
+        "--coverage-cache",
+        metavar="DIR",
+        help="reuse coverages and, with tiled engine, triangles of unchanged tiles "
+        "from previous runs",
+    )
+    parser.add_argument(
+        "--coverage-pyramid-dir",
+        metavar="DIR",
+        help="write coverage simplified for zoom bands to this directory, "
+        "index.json lists bands with their vertex counts and sizes in bytes",
+    )
+
+
+def _write_geojson(
+    filename: str,
+    coverage: shapely.geometry.MultiPolygon,
+    precision: int,
+    gzip_level: int | None,
+) -> None:
+    with open_atomic(filename, gzip_level=gzip_level) as f:
+        write_json_with_float_precision(
+            passes_coverage.coverage_to_geojson(coverage),
+            f,
+            precision=precision,
+            ensure_ascii=False,
+        )
+
+
+def _write_pyramid(
+    directory: str,
+    bands: dict[int, shapely.geometry.MultiPolygon],
+    precision: int,
+    gzip_level: int | None,
+) -> None:
+    """Write coverage of every zoom band and index.json describing them."""
+    os.makedirs(directory, exist_ok=True)
+    tolerances = dict(passes_coverage.COVERAGE_PYRAMID_BANDS)
+    index = []
+    for min_zoom, band_coverage in bands.items():
+        filename = f"{min_zoom}.json"
+        path = os.path.join(directory, filename)
+        _write_geojson(path, band_coverage, precision, gzip_level)
+        index.append(
+            {
+                "min_zoom": min_zoom,
+                "file": filename,
+                "simplify_meters": tolerances[min_zoom],
+                "vertices": int(shapely.get_num_coordinates(band_coverage)),
+                "bytes": os.path.getsize(path),
+            }
+        )
+    with open_atomic(os.path.join(directory, "index.json"), gzip_level=gzip_level) as f:
+        json.dump(index, f)
+
+
+def write_coverage(
+    conf: argparse.Namespace,
+    points: npt.ArrayLike,
+    region_ids: Sequence[str],
+    precision: int,
+) -> shapely.geometry.MultiPolygon:
+    """Write global coverage and, if requested, coverages of regions and pyramid.
+
+    Points are (lon, lat) pairs, region_ids are regions of points. Regions or,
+    with tiled engine, tiles are processed in conf.jobs processes.
+    """
+    cache = None
+    if conf.coverage_cache:
+        cache = CoverageCache(conf.coverage_cache)
+    pyramid = None
+    if conf.coverage_pyramid_dir:
+        pyramid = passes_coverage.make_coverage_pyramid(
+            points, engine=conf.coverage_engine, jobs=conf.jobs, cache=cache
+        )
+        _write_pyramid(
+            conf.coverage_pyramid_dir, pyramid.bands, precision, conf.gzip_level
+        )
+    if conf.regions_coverage_dir:
+        regions_coverage = passes_coverage.make_regions_coverage(
+            points,
+            region_ids,
+            jobs=conf.jobs,
+            engine=conf.coverage_engine,
+            cache=cache,
+        )
+        os.makedirs(conf.regions_coverage_dir, exist_ok=True)
+        filenames = []
+        for region_id, region_coverage in regions_coverage.items():
+            filename = os.path.join(conf.regions_coverage_dir, f"{region_id}.json")
+            _write_geojson(filename, region_coverage, precision, conf.gzip_level)
+            filenames.append(Path(filename))
+        # Regions without passes must not keep coverage of previous runs.
+        remove_stale_files(conf.regions_coverage_dir, "*.json", set(filenames))
+        coverage = passes_coverage.merge_coverages(regions_coverage.values())
+    elif pyramid is not None:
+        coverage = pyramid.coverage
+    else:
+        coverage = passes_coverage.make_coverage(
+            points, engine=conf.coverage_engine, jobs=conf.jobs, cache=cache
+        )
+    if cache is not None:
+        cache.save()
+        print(
+            f"Coverages taken from cache: {cache.result_hits}, "
+            f"built: {cache.result_misses}; "
+            f"tiles taken from cache: {cache.tile_hits}, built: {cache.tile_misses}",
+            file=sys.stderr,
+        )
+    _write_geojson(conf.output_coverage, coverage, precision, conf.gzip_level)
+    return coverage
@@ -1,15 +1,18 @@
 # coding: utf-8
-import urllib.request
+import shutil
 from argparse import ArgumentParser
 
-from .fstr_to_nakarte_json import SPREADSHEET_URL
+from mountain_passes_for_nakarte.utils import open_atomic
+
+from .fstr_to_nakarte_json import retrieve_table_file
 
 
 def main() -> None:
     parser = ArgumentParser()
     parser.add_argument("filename", default=["fstr.ods"], nargs="*")
     conf = parser.parse_args()
-    urllib.request.urlretrieve(SPREADSHEET_URL, conf.filename[0])
+    with open_atomic(conf.filename[0], "wb") as f:
+        shutil.copyfileobj(retrieve_table_file(), f)
 
 
 if __name__ == "__main__":
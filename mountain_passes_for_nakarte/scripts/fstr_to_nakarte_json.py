@@ -1,15 +1,33 @@
 import argparse
 import io
 import urllib.request
-from typing import Any, BinaryIO
+from typing import BinaryIO
+
+import numpy as np
 
-from mountain_passes_for_nakarte import passes_coverage
 from mountain_passes_for_nakarte.fstr.catalogueparser import parse_catalog
 from mountain_passes_for_nakarte.fstr.nakartewriter import (
     NakartePassPoint,
     convert_catalogue_for_nakarte,
 )
-from mountain_passes_for_nakarte.utils import write_json_file_with_fixed_precision
+from mountain_passes_for_nakarte.scripts.columnar_passes_args import (
+    add_columnar_passes_argument,
+    write_columnar_passes,
+)
+from mountain_passes_for_nakarte.scripts.coverage_args import (
+    add_coverage_arguments,
+    add_jobs_argument,
+    write_coverage,
+)
+from mountain_passes_for_nakarte.scripts.output_args import add_gzip_argument
+from mountain_passes_for_nakarte.scripts.vector_tiles_args import (
+    add_vector_tiles_arguments,
+    write_vector_tiles,
+)
+from mountain_passes_for_nakarte.utils import (
+    PRECISION,
+    write_json_file_with_fixed_precision,
+)
 
 # pylint: disable-next=line-too-long
 SPREADSHEET_URL = "https://docs.google.com/spreadsheets/d/1azG7VCU_zvEotb45JGnAJd5J4QI4JOM5_RojHwPyxgg/export?format=ods"
@@ -23,9 +41,15 @@ def retrieve_table_file() -> BinaryIO:
     return io.BytesIO(data)
 
 
-def build_coverage(passes: list[NakartePassPoint]) -> Any:
-    points = [(p["latlon"][1], p["latlon"][0]) for p in passes]
-    return passes_coverage.make_coverage_geojson(points)
+def build_coverage(conf: argparse.Namespace, passes: list[NakartePassPoint]) -> None:
+    latlons = np.fromiter(
+        (p["latlon"] for p in passes),
+        dtype=np.dtype((np.float64, 2)),
+        count=len(passes),
+    )
+    region_ids = [p["region_id"] for p in passes]
+    coverage = write_coverage(conf, latlons[:, ::-1], region_ids, precision=PRECISION)
+    write_vector_tiles(conf, latlons, passes, coverage)
 
 
 def main() -> None:
@@ -35,13 +59,22 @@ def main() -> None:
     parser.add_argument(
         "--local-table", type=argparse.FileType(mode="rb"), required=False
     )
+    add_coverage_arguments(parser)
+    add_vector_tiles_arguments(parser)
+    add_columnar_passes_argument(parser)
+    add_gzip_argument(parser)
+    add_jobs_argument(
+        parser, "build coverage of regions and encode vector tiles in N processes"
+    )
     conf = parser.parse_args()
     table_file = conf.local_table if conf.local_table else retrieve_table_file()
     catalogue = parse_catalog(table_file)
     nakarte_data = convert_catalogue_for_nakarte(catalogue)
-    write_json_file_with_fixed_precision(conf.output_passes, nakarte_data)
-    coverage = build_coverage(nakarte_data["passes"])
-    write_json_file_with_fixed_precision(conf.output_coverage, coverage)
+    write_json_file_with_fixed_precision(
+        conf.output_passes, nakarte_data, gzip_level=conf.gzip_level
+    )
+    write_columnar_passes(conf, nakarte_data, precision=PRECISION)
+    build_coverage(conf, nakarte_data["passes"])
 
 
 if __name__ == "__main__":
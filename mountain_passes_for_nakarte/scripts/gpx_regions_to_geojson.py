@@ -3,7 +3,11 @@ import re
 import xml.etree.ElementTree as ET
 from typing import NamedTuple
 
-from mountain_passes_for_nakarte.utils import write_json_with_float_precision
+from mountain_passes_for_nakarte.scripts.output_args import add_gzip_argument
+from mountain_passes_for_nakarte.utils import (
+    open_atomic,
+    write_json_with_float_precision,
+)
 
 
 class LabelPoint(NamedTuple):
@@ -31,7 +35,9 @@ def read_points_from_gpx(filename: str) -> list[LabelPoint]:
     return points
 
 
-def save_points_to_geojson(filename: str, points: list[LabelPoint]) -> None:
+def save_points_to_geojson(
+    filename: str, points: list[LabelPoint], gzip_level: int | None = None
+) -> None:
     data = []
     for point in points:
         data.append(
@@ -44,7 +50,7 @@ def save_points_to_geojson(filename: str, points: list[LabelPoint]) -> None:
                 },
             }
         )
-    with open(filename, "w", encoding="utf-8") as f:
+    with open_atomic(filename, gzip_level=gzip_level) as f:
         write_json_with_float_precision(data, f, 5, ensure_ascii=False)
 
 
@@ -52,10 +58,11 @@ def main() -> None:
     parser = argparse.ArgumentParser()
     parser.add_argument("input")
     parser.add_argument("output")
+    add_gzip_argument(parser)
     conf = parser.parse_args()
 
     points = read_points_from_gpx(conf.input)
-    save_points_to_geojson(conf.output, points)
+    save_points_to_geojson(conf.output, points, conf.gzip_level)
 
 
 if __name__ == "__main__":
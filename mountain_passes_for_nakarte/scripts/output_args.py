@@ -0,0 +1,14 @@
+"""Command line option for compressed copies of output files shared by scripts."""
+
+import argparse
+
+
+def add_gzip_argument(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--gzip-level",
+        type=int,
+        choices=range(1, 10),
+        metavar="N",
+        help="also write every output file compressed with gzip at level N as "
+        "FILE.gz, with fixed timestamp so that it changes only with content",
+    )
@@ -0,0 +1,49 @@
+"""Command line options for writing vector tiles shared by scripts."""
+
+import argparse
+import sys
+from typing import Any, Sequence
+
+import numpy.typing as npt
+import shapely
+
+from mountain_passes_for_nakarte import vector_tiles
+
+
+def add_vector_tiles_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--vector-tiles-dir",
+        metavar="DIR",
+        help="write passes and coverage as Mapbox Vector Tiles DIR/z/x/y.pbf",
+    )
+    parser.add_argument(
+        "--vector-tiles-max-zoom",
+        type=int,
+        default=vector_tiles.DEFAULT_MAX_ZOOM,
+        metavar="ZOOM",
+        help="last zoom of vector tiles, clients overzoom tiles of this zoom",
+    )
+
+
+def write_vector_tiles(
+    conf: argparse.Namespace,
+    latlons: npt.NDArray[Any],
+    passes: Sequence[Any],
+    coverage: shapely.geometry.MultiPolygon,
+) -> None:
+    """Write tiles if requested, latlons are coordinates of passes."""
+    if not conf.vector_tiles_dir:
+        return
+    tiles = vector_tiles.make_vector_tiles(
+        latlons,
+        [vector_tiles.pass_properties(p) for p in passes],
+        coverage,
+        max_zoom=conf.vector_tiles_max_zoom,
+        jobs=conf.jobs,
+    )
+    vector_tiles.write_vector_tiles(conf.vector_tiles_dir, tiles, conf.gzip_level)
+    size = sum(len(data) for data in tiles.values())
+    print(
+        f"Vector tiles written: {len(tiles)}, {size / 2**20:.1f} MiB",
+        file=sys.stderr,
+    )
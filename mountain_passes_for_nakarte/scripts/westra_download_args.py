@@ -0,0 +1,69 @@
+"""Command line options for downloading Westra tree shared by scripts."""
+
+import argparse
+import sys
+
+from mountain_passes_for_nakarte.westra.api_client import WestraApiClient
+from mountain_passes_for_nakarte.westra.download_journal import DownloadJournal
+from mountain_passes_for_nakarte.westra.regions_tree import RegionsTree
+
+
+def add_download_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--download-workers",
+        type=int,
+        default=1,
+        help="number of regions downloaded concurrently",
+    )
+    parser.add_argument(
+        "--download-retries",
+        type=int,
+        default=0,
+        help="number of retries for failed request",
+    )
+    parser.add_argument(
+        "--download-time-budget",
+        type=float,
+        help="maximum time in seconds for all requests to API",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        help="directory for caching API responses between runs",
+    )
+    parser.add_argument(
+        "--journal-dir",
+        help="directory where every region is saved as soon as it is downloaded",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="download only regions missing in --journal-dir",
+    )
+
+
+def download_tree(
+    parser: argparse.ArgumentParser, conf: argparse.Namespace
+) -> RegionsTree:
+    if conf.resume and not conf.journal_dir:
+        parser.error("--resume requires --journal-dir")
+    journal = None
+    if conf.journal_dir:
+        journal = DownloadJournal(conf.journal_dir, resume=conf.resume)
+    with WestraApiClient(
+        conf.api_key,
+        conf.api_host,
+        retries=conf.download_retries,
+        time_budget=conf.download_time_budget,
+        cache_dir=conf.cache_dir,
+    ) as client:
+        tree = RegionsTree.from_client(
+            client, workers=conf.download_workers, journal=journal
+        )
+    if client.cache is not None:
+        stats = client.cache.stats
+        print(
+            f"Cache hits: {stats.hits}, misses: {stats.misses}, "
+            f"not cacheable (no ETag or Last-Modified): {stats.not_cacheable}",
+            file=sys.stderr,
+        )
+    return tree
@@ -1,26 +1,63 @@
 import argparse
-from typing import TypedDict
+import sys
 
-from mountain_passes_for_nakarte import passes_coverage
-from mountain_passes_for_nakarte.utils import write_json_with_float_precision
-from mountain_passes_for_nakarte.westra.pass_normalizers import (
-    NakartePass,
-    westra_pass_to_nakarte,
+import numpy as np
+
+from mountain_passes_for_nakarte.scripts.columnar_passes_args import (
+    add_columnar_passes_argument,
+    write_columnar_passes,
+)
+from mountain_passes_for_nakarte.scripts.coverage_args import (
+    add_coverage_arguments,
+    add_jobs_argument,
+    write_coverage,
+)
+from mountain_passes_for_nakarte.scripts.output_args import add_gzip_argument
+from mountain_passes_for_nakarte.scripts.vector_tiles_args import (
+    add_vector_tiles_arguments,
+    write_vector_tiles,
+)
+from mountain_passes_for_nakarte.scripts.westra_download_args import (
+    add_download_arguments,
+    download_tree,
 )
+from mountain_passes_for_nakarte.utils import (
+    open_atomic,
+    write_json_with_float_precision,
+)
+from mountain_passes_for_nakarte.westra.binary_snapshot import (
+    BinaryRegionsTree,
+    is_binary_snapshot,
+)
+from mountain_passes_for_nakarte.westra.compact_tree import CompactRegionsTree
+from mountain_passes_for_nakarte.westra.nakartewriter import convert_tree_for_nakarte
+from mountain_passes_for_nakarte.westra.normalized_store import NormalizedPassesStore
 from mountain_passes_for_nakarte.westra.regions_tree import RegionsTree
+from mountain_passes_for_nakarte.westra.spatial_check import check_passes_locations
+from mountain_passes_for_nakarte.westra.tree_stream import StreamingRegionsTree
 
 
-class NakarteRegion(TypedDict):
-    name: str
-
-
-class NakarteData(TypedDict):
-    passes: list[NakartePass]
-    regions: dict[str, NakarteRegion]
+def load_tree(
+    parser: argparse.ArgumentParser, conf: argparse.Namespace
+) -> RegionsTree | StreamingRegionsTree | CompactRegionsTree | BinaryRegionsTree:
+    if conf.load_tree and is_binary_snapshot(conf.load_tree):
+        return BinaryRegionsTree(conf.load_tree)
+    if conf.load_tree:
+        streaming_tree = StreamingRegionsTree(conf.load_tree)
+        if conf.compact_tree:
+            return CompactRegionsTree.from_regions(
+                streaming_tree.world, streaming_tree.iterate_top_level_regions()
+            )
+        return streaming_tree
+    if not conf.api_key:
+        parser.error("--api-key is required to load tree from server")
+    regions_tree = download_tree(parser, conf)
+    if conf.compact_tree:
+        return CompactRegionsTree.from_tree(regions_tree.tree)
+    return regions_tree
 
 
 def main() -> None:
-    # pylint: disable=too-many-locals # refactoring needed
     parser = argparse.ArgumentParser()
     parser.add_argument("output_passes")
     parser.add_argument("output_coverage")
@@ -29,47 +66,67 @@ def main() -> None:
     source_group = parser.add_mutually_exclusive_group()
     source_group.add_argument("--load-tree")
     source_group.add_argument("--api-key")
+    add_download_arguments(parser)
+    add_coverage_arguments(parser)
+    add_vector_tiles_arguments(parser)
+    add_columnar_passes_argument(parser)
+    add_gzip_argument(parser)
+    parser.add_argument(
+        "--compact-tree",
+        action="store_true",
+        help="keep tree in memory in compact form",
+    )
+    add_jobs_argument(
+        parser,
+        "normalize passes, build coverage of regions and encode vector tiles in N processes",
+    )
+    parser.add_argument(
+        "--normalized-store",
+        metavar="FILE",
+        help="normalize only passes changed since previous run with same FILE",
+    )
+    parser.add_argument(
+        "--spatial-check-report",
+        metavar="FILE",
+        help="write report on passes located far from other passes of their region",
+    )
     conf = parser.parse_args()
-    if conf.load_tree:
-        with open(conf.load_tree, encoding="utf-8") as f:
-            westra_regions = RegionsTree.from_file(f)
-    else:
-        if not conf.api_key:
-            parser.error("--api-key is required to load tree from server")
-        westra_regions = RegionsTree.from_remote(
-            api_host=conf.api_host, api_key=conf.api_key
-        )
-    passes = []
-    for westra_pass, regions_path in westra_regions.iterate_passes():
-        nk_pass = westra_pass_to_nakarte(westra_pass, regions_path)
-        if nk_pass:
-            passes.append(nk_pass)
-    regions = {}
-    for region_path in westra_regions.iterate_regions():
-        region = region_path[-1]
-        if region["id"] == "0":
-            continue
-        regions[region["id"]] = NakarteRegion(name=region["title"])
-
-    passes_data = NakarteData(passes=passes, regions=regions)
-    with open(conf.output_passes, "w", encoding="utf-8") as f:
+    westra_regions = load_tree(parser, conf)
+    store = None
+    if conf.normalized_store:
+        store = NormalizedPassesStore(conf.normalized_store)
+    passes_data, regions_names = convert_tree_for_nakarte(
+        westra_regions, jobs=conf.jobs, store=store
+    )
+    with open_atomic(conf.output_passes, gzip_level=conf.gzip_level) as f:
         write_json_with_float_precision(passes_data, f, precision=6, ensure_ascii=False)
+    write_columnar_passes(conf, passes_data, precision=6)
+    if store is not None:
+        store.save()
+        print(
+            f"Passes taken from store: {store.hits}, normalized: {store.misses}",
+            file=sys.stderr,
+        )
 
-    points = [(p["latlon"][1], p["latlon"][0]) for p in passes]
-    coverage = passes_coverage.make_coverage_geojson(points)
-    with open(conf.output_coverage, "w", encoding="utf-8") as f:
-        write_json_with_float_precision(coverage, f, precision=3, ensure_ascii=False)
+    passes = passes_data["passes"]
+    if conf.spatial_check_report:
+        report = check_passes_locations(passes)
+        with open_atomic(conf.spatial_check_report, gzip_level=conf.gzip_level) as f:
+            write_json_with_float_precision(report, f, precision=6, ensure_ascii=False)
+        misplaced_count = len(report["misplaced_passes"])
+        print(f"Passes far from their region: {misplaced_count}", file=sys.stderr)
+    latlons = np.fromiter(
+        (p["latlon"] for p in passes),
+        dtype=np.dtype((np.float64, 2)),
+        count=len(passes),
+    )
+    points = latlons[:, ::-1]
+    # Passes in the world region itself, if any, are assigned to its id.
+    region_ids = [p["regions"][0] if p["regions"] else "0" for p in passes]
+    coverage = write_coverage(conf, points, region_ids, precision=3)
+    write_vector_tiles(conf, latlons, passes, coverage)
 
-    regions_names = []
-    for level in [1, 2]:
-        for region in westra_regions.list_regions_at_level(level):
-            for westra_pass, _unused in westra_regions.iterate_passes(region):
-                pass_ = westra_pass_to_nakarte(westra_pass, [region])
-                if pass_:
-                    region_title = region["title"]
-                    regions_names.append(f"{level}:{region_title}")
-                    break
-    with open(conf.output_regions, "w", encoding="utf-8") as f:
+    with open_atomic(conf.output_regions, gzip_level=conf.gzip_level) as f:
         f.write("\n".join(regions_names))
 
 
@@ -0,0 +1,37 @@
+"""Convert Westra tree snapshot between JSON and binary formats."""
+
+from argparse import ArgumentParser
+
+from mountain_passes_for_nakarte.utils import open_atomic
+from mountain_passes_for_nakarte.westra.binary_snapshot import (
+    BinaryRegionsTree,
+    is_binary_snapshot,
+    write_binary_snapshot,
+)
+from mountain_passes_for_nakarte.westra.tree_stream import StreamingRegionsTree
+
+
+def main() -> None:
+    parser = ArgumentParser(
+        description="Convert JSON tree snapshot to binary one and vice versa, "
+        "format of input is detected automatically."
+    )
+    parser.add_argument("input_tree")
+    parser.add_argument("output_tree")
+    conf = parser.parse_args()
+
+    if is_binary_snapshot(conf.input_tree):
+        binary_tree = BinaryRegionsTree(conf.input_tree)
+        with open_atomic(conf.output_tree) as f:
+            binary_tree.write_json(f)
+        binary_tree.close()
+    else:
+        streaming_tree = StreamingRegionsTree(conf.input_tree)
+        with open_atomic(conf.output_tree, "wb") as f:
+            write_binary_snapshot(
+                f, streaming_tree.world, streaming_tree.iterate_top_level_regions()
+            )
+
+
+if __name__ == "__main__":
+    main()
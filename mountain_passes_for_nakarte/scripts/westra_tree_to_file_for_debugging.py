@@ -1,6 +1,11 @@
 from argparse import ArgumentParser
 
-from mountain_passes_for_nakarte.westra.regions_tree import RegionsTree
+from mountain_passes_for_nakarte.scripts.westra_download_args import (
+    add_download_arguments,
+    download_tree,
+)
+from mountain_passes_for_nakarte.utils import open_atomic
+from mountain_passes_for_nakarte.westra.binary_snapshot import write_binary_snapshot
 
 
 def main() -> None:
@@ -8,10 +13,18 @@ def main() -> None:
     parser.add_argument("output_tree")
     parser.add_argument("--api-host", default="https://westra.ru")
     parser.add_argument("--api-key", required=True)
+    add_download_arguments(parser)
+    parser.add_argument(
+        "--binary", action="store_true", help="save tree in binary format"
+    )
     conf = parser.parse_args()
 
-    regions = RegionsTree.from_remote(conf.api_key)
-    with open(conf.output_tree, "w", encoding="utf-8") as f:
+    regions = download_tree(parser, conf)
+    if conf.binary:
+        with open_atomic(conf.output_tree, "wb") as f:
+            write_binary_snapshot(f, regions.tree, regions.tree["places"])
+        return
+    with open_atomic(conf.output_tree) as f:
         regions.save_to_file(f)
 
 
@@ -1,26 +1,203 @@
 # coding: utf-8
+import contextlib
+import gzip
 import json
-from typing import Any, TextIO
+import os
+import shutil
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import (
+    IO,
+    Any,
+    BinaryIO,
+    Callable,
+    Collection,
+    ContextManager,
+    Iterator,
+    Literal,
+    TextIO,
+    TypeVar,
+    overload,
+)
 
 PRECISION = 5
+JSON_WRITE_CHUNK_SIZE = 1 << 16
 
+K = TypeVar("K")
+T = TypeVar("T")
 
-def round_floats(data: Any, precision: int) -> Any:
-    if isinstance(data, float):
-        return round(data, precision)
-    if isinstance(data, dict):
-        return {k: round_floats(v, precision) for k, v in data.items()}
-    if isinstance(data, (list, tuple)):
-        return [round_floats(x, precision) for x in data]
-    return data
+
+def iter_json_with_float_precision(
+    data: Any, precision: int, **kwargs: Any
+) -> Iterator[str]:
+    """Encode data like json.dumps does, with floats rounded to precision.
+
+    Floats are rounded as encoded, data is not copied. Float keys of dicts
+    are rounded too.
+    """
+    encoder = json.JSONEncoder(indent=None, **kwargs)
+
+    def floatstr(o: float) -> str:
+        if o != o:  # pylint: disable=comparison-with-itself
+            text = "NaN"
+        elif o == float("inf"):
+            text = "Infinity"
+        elif o == float("-inf"):
+            text = "-Infinity"
+        else:
+            return float.__repr__(round(o, precision))
+        if not encoder.allow_nan:
+            raise ValueError(f"Out of range float values are not JSON compliant: {o!r}")
+        return text
+
+    # Private API is used on purpose: C encoder does not accept custom float
+    # formatting and public JSONEncoder methods can not change it, pure Python
+    # encoder does. Output is pinned against json.dumps in tests.
+    # pylint: disable-next=protected-access
+    iterencode = json.encoder._make_iterencode(  # type: ignore[attr-defined]
+        {} if encoder.check_circular else None,
+        encoder.default,
+        (
+            json.encoder.encode_basestring_ascii
+            if encoder.ensure_ascii
+            else json.encoder.encode_basestring
+        ),
+        None,
+        floatstr,
+        encoder.key_separator,
+        encoder.item_separator,
+        encoder.sort_keys,
+        encoder.skipkeys,
+        False,
+    )
+    return iterencode(data, 0)  # type: ignore[no-any-return]
 
 
 def write_json_with_float_precision(
     data: Any, fd: TextIO, precision: int, **kwargs: Any
 ) -> None:
-    json.dump(round_floats(data, precision), fd, indent=None, **kwargs)
+    chunks = []
+    size = 0
+    for chunk in iter_json_with_float_precision(data, precision, **kwargs):
+        chunks.append(chunk)
+        size += len(chunk)
+        if size >= JSON_WRITE_CHUNK_SIZE:
+            fd.write("".join(chunks))
+            chunks = []
+            size = 0
+    fd.write("".join(chunks))
 
 
-def write_json_file_with_fixed_precision(filename: str, data: Any) -> None:
-    with open(filename, "w", encoding="utf-8") as f:
+def write_json_file_with_fixed_precision(
+    filename: str, data: Any, gzip_level: int | None = None
+) -> None:
+    with open_atomic(filename, gzip_level=gzip_level) as f:
         write_json_with_float_precision(data, f, precision=5, ensure_ascii=False)
+
+
+def _temporary_path(path: Path) -> Path:
+    return path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+
+
+def _gzip_path(path: Path) -> Path:
+    return path.with_name(f"{path.name}.gz")
+
+
+def _replace(tmp_path: Path, path: Path, gzip_level: int | None) -> None:
+    """Move tmp_path to path and write path.gz or delete stale one."""
+    gzip_path = _gzip_path(path)
+    if gzip_level is None:
+        os.replace(tmp_path, path)
+        gzip_path.unlink(missing_ok=True)
+        return
+    tmp_gzip_path = _temporary_path(gzip_path)
+    try:
+        with open(tmp_path, "rb") as src, open(tmp_gzip_path, "wb") as dst:
+            # Without name and with fixed mtime compressed file depends only
+            # on content.
+            with gzip.GzipFile(
+                filename="", mode="wb", compresslevel=gzip_level, fileobj=dst, mtime=0
+            ) as compressed:
+                shutil.copyfileobj(src, compressed)
+        os.replace(tmp_path, path)
+        os.replace(tmp_gzip_path, gzip_path)
+    finally:
+        tmp_gzip_path.unlink(missing_ok=True)
+
+
+@contextlib.contextmanager
+def _atomic_file(
+    path: Path, mode: str, gzip_level: int | None
+) -> Iterator[IO[str] | IO[bytes]]:
+    tmp_path = _temporary_path(path)
+    encoding = None if "b" in mode else "utf-8"
+    try:
+        with open(tmp_path, mode, encoding=encoding) as f:
+            yield f
+        _replace(tmp_path, path, gzip_level)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+
+
+@overload
+def open_atomic(
+    path: str | Path, mode: Literal["w"] = "w", gzip_level: int | None = None
+) -> ContextManager[TextIO]: ...
+
+
+@overload
+def open_atomic(
+    path: str | Path, mode: Literal["wb"], gzip_level: int | None = None
+) -> ContextManager[BinaryIO]: ...
+
+
+def open_atomic(
+    path: str | Path, mode: str = "w", gzip_level: int | None = None
+) -> ContextManager[IO[str] | IO[bytes]]:
+    """Open file for writing so that readers never see partial content.
+
+    Data is written to temporary file that replaces path when context exits
+    without error. With gzip_level compressed copy path.gz is written too,
+    otherwise stale path.gz is deleted. Text is written in UTF-8.
+    """
+    return _atomic_file(Path(path), mode, gzip_level)
+
+
+def write_bytes_atomic(path: Path, data: bytes, gzip_level: int | None = None) -> None:
+    """Write file so that readers see either old or new content, never partial."""
+    with open_atomic(path, "wb", gzip_level) as f:
+        f.write(data)
+
+
+def remove_stale_files(
+    directory: str | Path, pattern: str, keep: Collection[Path]
+) -> None:
+    """Delete files matching pattern in directory, except files in keep.
+
+    Compressed copies path.gz are kept or deleted together with path.
+    Subdirectories left empty are deleted.
+    """
+    directory = Path(directory)
+    for path in [*directory.glob(pattern), *directory.glob(f"{pattern}.gz")]:
+        original = path.with_name(path.name.removesuffix(".gz"))
+        if original not in keep:
+            path.unlink()
+    subdirectories = [path for path in directory.rglob("*") if path.is_dir()]
+    # Deepest first, so that parents of deleted directories can become empty
+    for subdirectory in sorted(
+        subdirectories, key=lambda p: len(p.parts), reverse=True
+    ):
+        if not any(subdirectory.iterdir()):
+            subdirectory.rmdir()
+
+
+def map_tasks(
+    function: Callable[..., T], tasks: dict[K, tuple[Any, ...]], jobs: int
+) -> dict[K, T]:
+    """Call function with arguments of every task, in jobs processes."""
+    if jobs <= 1:
+        return {key: function(*args) for key, args in tasks.items()}
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        futures = {key: executor.submit(function, *args) for key, args in tasks.items()}
+        return {key: future.result() for key, future in futures.items()}
@@ -0,0 +1,307 @@
+# coding: utf-8
+"""Mapbox Vector Tiles of passes and coverage.
+
+Encoder implements the part of MVT 2.1 used here: layers of point and polygon
+features with string, number and boolean properties. Tiles are addressed as
+z/x/y with y counted from the north, like tiles of web maps.
+"""
+
+import os
+import struct
+from pathlib import Path
+from typing import Iterable, Mapping, NamedTuple, Sequence
+
+import numpy as np
+import numpy.typing as npt
+import shapely
+from shapely.geometry.polygon import orient
+
+from .utils import map_tasks, remove_stale_files, write_bytes_atomic
+from .webmercator import R, wgs84_to_web_mercator_array
+
+EXTENT = 4096
+# Features are kept in tiles this far beyond tile border, in tile units
+BUFFER = 64
+DEFAULT_MAX_ZOOM = 10
+PASSES_LAYER = "passes"
+COVERAGE_LAYER = "coverage"
+
+POINT = 1
+POLYGON = 3
+MOVE_TO = 1
+LINE_TO = 2
+CLOSE_PATH = 7
+
+PropertyValue = str | int | float | bool
+TileKey = tuple[int, int, int]
+
+
+class TileFeature(NamedTuple):
+    geometry_type: int
+    geometry: list[int]
+    properties: dict[str, PropertyValue]
+
+
+def zigzag(n: int) -> int:
+    return (n << 1) ^ (n >> 63)
+
+
+def _varint(n: int) -> bytes:
+    result = bytearray()
+    while n > 0x7F:
+        result.append((n & 0x7F) | 0x80)
+        n >>= 7
+    result.append(n)
+    return bytes(result)
+
+
+def _varint_field(field: int, n: int) -> bytes:
+    return _varint(field << 3) + _varint(n)
+
+
+def _bytes_field(field: int, data: bytes) -> bytes:
+    return _varint(field << 3 | 2) + _varint(len(data)) + data
+
+
+def _packed_field(field: int, numbers: Iterable[int]) -> bytes:
+    return _bytes_field(field, b"".join(_varint(n) for n in numbers))
+
+
+def _command(command_id: int, count: int) -> int:
+    return command_id | count << 3
+
+
+def _encode_value(value: PropertyValue) -> bytes:
+    if isinstance(value, bool):
+        return _varint_field(7, int(value))
+    if isinstance(value, int):
+        return _varint_field(6, zigzag(value))
+    if isinstance(value, float):
+        return _varint(3 << 3 | 1) + struct.pack("<d", value)
+    return _bytes_field(1, value.encode())
+
+
+def encode_points(points: npt.NDArray[np.int_]) -> list[int]:
+    """Geometry of points given in tile coordinates, array of shape (n, 2)."""
+    deltas = np.diff(points, axis=0, prepend=[[0, 0]])
+    return [_command(MOVE_TO, len(points))] + [zigzag(int(d)) for d in deltas.ravel()]
+
+
+def encode_polygons(polygons: Iterable[shapely.geometry.Polygon]) -> list[int]:
+    """Geometry of polygons with integer tile coordinates and valid winding."""
+    commands = []
+    cursor = np.zeros(2, dtype=np.int64)
+    for polygon in polygons:
+        for ring in [polygon.exterior, *polygon.interiors]:
+            coords = np.asarray(ring.coords, dtype=np.int64)[:-1]
+            deltas = np.diff(coords, axis=0, prepend=[cursor])
+            cursor = coords[-1]
+            zigzagged = [zigzag(int(d)) for d in deltas.ravel()]
+            commands.append(_command(MOVE_TO, 1))
+            commands.extend(zigzagged[:2])
+            commands.append(_command(LINE_TO, len(coords) - 1))
+            commands.extend(zigzagged[2:])
+            commands.append(_command(CLOSE_PATH, 1))
+    return commands
+
+
+def encode_layer(name: str, features: Sequence[TileFeature]) -> bytes:
+    keys: dict[str, int] = {}
+    values: dict[tuple[type, PropertyValue], int] = {}
+    encoded_features = []
+    for feature in features:
+        tags = []
+        for key, value in feature.properties.items():
+            tags.append(keys.setdefault(key, len(keys)))
+            # 1 and True are equal but are encoded differently
+            tags.append(values.setdefault((type(value), value), len(values)))
+        encoded_features.append(
+            _packed_field(2, tags)
+            + _varint_field(3, feature.geometry_type)
+            + _packed_field(4, feature.geometry)
+        )
+    return b"".join(
+        [
+            _varint_field(15, 2),
+            _bytes_field(1, name.encode()),
+            *(_bytes_field(2, feature) for feature in encoded_features),
+            *(_bytes_field(3, key.encode()) for key in keys),
+            *(_bytes_field(4, _encode_value(value)) for _, value in values),
+            _varint_field(5, EXTENT),
+        ]
+    )
+
+
+def encode_tile(layers: dict[str, Sequence[TileFeature]]) -> bytes:
+    """Tile with non-empty layers."""
+    return b"".join(
+        _bytes_field(3, encode_layer(name, features))
+        for name, features in layers.items()
+        if features
+    )
+
+
+def tile_size(zoom: int) -> float:
+    return 2 * R / (1 << zoom)
+
+
+def tile_bounds(key: TileKey) -> tuple[float, float, float, float]:
+    """Bounds of tile in Web Mercator, with buffer."""
+    zoom, x, y = key
+    size = tile_size(zoom)
+    buffer = size * BUFFER / EXTENT
+    min_x = x * size - R
+    max_y = R - y * size
+    return min_x - buffer, max_y - size - buffer, min_x + size + buffer, max_y + buffer
+
+
+def to_tile_coords(
+    coords: npt.NDArray[np.float64], key: TileKey
+) -> npt.NDArray[np.float64]:
+    zoom, x, y = key
+    scale = EXTENT / tile_size(zoom)
+    return np.column_stack(
+        [
+            (coords[:, 0] + R) * scale - x * EXTENT,
+            (R - coords[:, 1]) * scale - y * EXTENT,
+        ]
+    )
+
+
+def _tiles_ranges(
+    bounds: npt.NDArray[np.float64], zoom: int
+) -> tuple[npt.NDArray[np.int_], ...]:
+    """First and last tiles by x and y touched by bounds with buffer."""
+    scale = EXTENT / tile_size(zoom)
+    last = 2**zoom - 1
+    min_x = np.floor(((bounds[:, 0] + R) * scale - BUFFER) / EXTENT)
+    max_x = np.floor(((bounds[:, 2] + R) * scale + BUFFER) / EXTENT)
+    min_y = np.floor(((R - bounds[:, 3]) * scale - BUFFER) / EXTENT)
+    max_y = np.floor(((R - bounds[:, 1]) * scale + BUFFER) / EXTENT)
+    return tuple(
+        np.clip(a, 0, last).astype(np.int_) for a in (min_x, max_x, min_y, max_y)
+    )
+
+
+def _points_tiles(
+    coords: npt.NDArray[np.float64], zoom: int
+) -> dict[TileKey, list[int]]:
+    """Indexes of points in every tile, points near borders are in several."""
+    tiles: dict[TileKey, list[int]] = {}
+    min_x, max_x, min_y, max_y = _tiles_ranges(np.hstack([coords, coords]), zoom)
+    for i in range(len(coords)):
+        for x in range(min_x[i], max_x[i] + 1):
+            for y in range(min_y[i], max_y[i] + 1):
+                tiles.setdefault((zoom, x, y), []).append(i)
+    return tiles
+
+
+def _polygons_tiles(
+    polygons: npt.NDArray[np.object_], zoom: int
+) -> dict[TileKey, list[int]]:
+    """Indexes of polygons intersecting every tile."""
+    min_x, max_x, min_y, max_y = _tiles_ranges(shapely.bounds(polygons), zoom)
+    keys = sorted(
+        {
+            (zoom, x, y)
+            for i in range(len(polygons))
+            for x in range(min_x[i], max_x[i] + 1)
+            for y in range(min_y[i], max_y[i] + 1)
+        }
+    )
+    boxes = shapely.box(*np.array([tile_bounds(key) for key in keys]).reshape(-1, 4).T)
+    tile_indexes, polygon_indexes = shapely.STRtree(polygons).query(
+        boxes, predicate="intersects"
+    )
+    tiles: dict[TileKey, list[int]] = {}
+    for tile_index, polygon_index in zip(tile_indexes, polygon_indexes):
+        tiles.setdefault(keys[tile_index], []).append(int(polygon_index))
+    return tiles
+
+
+def _build_tile(
+    key: TileKey,
+    coords: npt.NDArray[np.float64],
+    properties: list[dict[str, PropertyValue]],
+    polygons: npt.NDArray[np.object_],
+) -> bytes:
+    """Tile of points with their properties and of coverage polygons."""
+    points = np.round(to_tile_coords(coords, key)).astype(np.int64)
+    passes = [
+        TileFeature(POINT, encode_points(point[None]), point_properties)
+        for point, point_properties in zip(points, properties)
+    ]
+    coverage = []
+    if len(polygons):
+        clipped = shapely.clip_by_rect(shapely.union_all(polygons), *tile_bounds(key))
+        projected = shapely.transform(clipped, lambda c: to_tile_coords(c, key))
+        # Snapping to integer grid keeps polygons valid
+        snapped = shapely.set_precision(projected, grid_size=1)
+        polygons_parts = [
+            orient(part, sign=1.0)
+            for part in shapely.get_parts(snapped)
+            if part.geom_type == "Polygon" and not part.is_empty
+        ]
+        if polygons_parts:
+            coverage.append(TileFeature(POLYGON, encode_polygons(polygons_parts), {}))
+    return encode_tile({PASSES_LAYER: passes, COVERAGE_LAYER: coverage})
+
+
+def pass_properties(nakarte_pass: Mapping[str, object]) -> dict[str, PropertyValue]:
+    """Scalar fields of pass, lists and coordinates are left in passes file."""
+    return {
+        key: value
+        for key, value in nakarte_pass.items()
+        if isinstance(value, (str, int, float)) and key != "latlon"
+    }
+
+
+def make_vector_tiles(
+    latlons: npt.NDArray[np.float64],
+    properties: list[dict[str, PropertyValue]],
+    coverage: shapely.geometry.MultiPolygon,
+    max_zoom: int = DEFAULT_MAX_ZOOM,
+    jobs: int = 1,
+) -> dict[TileKey, bytes]:
+    """Tiles of zooms 0 to max_zoom, coverage is in Web Mercator.
+
+    Coverage is simplified to tile unit at every zoom. Tiles are encoded in
+    jobs processes.
+    """
+    # Web Mercator is limited to latitudes up to about 85 degrees
+    coords = wgs84_to_web_mercator_array(
+        np.clip(latlons[:, ::-1], [-180, -85.05], [180, 85.05])
+    )
+    tasks = {}
+    for zoom in range(max_zoom + 1):
+        simplified = shapely.simplify(coverage, tile_size(zoom) / EXTENT)
+        polygons = shapely.get_parts(simplified)
+        points_tiles = _points_tiles(coords, zoom)
+        polygons_tiles = _polygons_tiles(polygons, zoom) if len(polygons) else {}
+        for key in sorted(points_tiles.keys() | polygons_tiles.keys()):
+            indexes = points_tiles.get(key, [])
+            tasks[key] = (
+                key,
+                coords[indexes].reshape(-1, 2),
+                [properties[i] for i in indexes],
+                polygons[polygons_tiles.get(key, [])],
+            )
+    return map_tasks(_build_tile, tasks, jobs)
+
+
+def write_vector_tiles(
+    directory: str, tiles: dict[TileKey, bytes], gzip_level: int | None = None
+) -> None:
+    """Write tiles to directory as z/x/y.pbf, with gzip_level also z/x/y.pbf.gz.
+
+    Tiles of previous runs missing in tiles are deleted, so that tiles where
+    all passes were deleted or moved do not keep old data.
+    """
+    paths = set()
+    for (zoom, x, y), data in tiles.items():
+        tile_directory = os.path.join(directory, str(zoom), str(x))
+        os.makedirs(tile_directory, exist_ok=True)
+        path = Path(tile_directory, f"{y}.pbf")
+        write_bytes_atomic(path, data, gzip_level)
+        paths.add(path)
+    remove_stale_files(directory, "*/*/*.pbf", paths)
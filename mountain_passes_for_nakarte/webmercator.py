@@ -1,6 +1,9 @@
 # coding: utf-8
 import math
 
+import numpy as np
+import numpy.typing as npt
+
 R = 20037508.34
 
 
@@ -18,6 +21,28 @@ def web_mercator_to_wgs84(x: float, y: float) -> tuple[float, float]:
     return lon, lat
 
 
+def wgs84_to_web_mercator_array(
+    coords: npt.NDArray[np.float64],
+) -> npt.NDArray[np.float64]:
+    """Project array of (lon, lat) pairs of shape (n, 2)."""
+    lon = coords[:, 0]
+    lat = coords[:, 1]
+    x = lon * R / 180
+    y = np.log(np.tan((90 + lat) * math.pi / 360)) / (math.pi / 180)
+    y = y * R / 180
+    return np.column_stack([x, y])
+
+
+def web_mercator_to_wgs84_array(
+    coords: npt.NDArray[np.float64],
+) -> npt.NDArray[np.float64]:
+    """Unproject array of (x, y) pairs of shape (n, 2)."""
+    lon = (coords[:, 0] / R) * 180
+    lat = (coords[:, 1] / R) * 180
+    lat = 180 / math.pi * (2 * np.arctan(np.exp(lat * math.pi / 180)) - math.pi / 2)
+    return np.column_stack([lon, lat])
+
+
 if __name__ == "__main__":
     import unittest
 
@@ -46,4 +71,14 @@ if __name__ == "__main__":
             self.assertAlmostEqual(wgs_lon, expected_wgs_lon, delta=0.000001)
             self.assertAlmostEqual(wgs_lat, expected_wgs_lat, delta=0.000001)
 
+        def test_arrays_projection_matches_points_projection(self) -> None:
+            coords = np.array([[37.6175, 55.7522], [-70.5, -33.25], [0, 0]])
+            projected = wgs84_to_web_mercator_array(coords)
+            for point, projected_point in zip(coords, projected):
+                expected = wgs84_to_web_mercator(*point)
+                self.assertAlmostEqual(projected_point[0], expected[0], delta=1e-6)
+                self.assertAlmostEqual(projected_point[1], expected[1], delta=1e-6)
+            unprojected = web_mercator_to_wgs84_array(projected)
+            self.assertTrue(np.allclose(unprojected, coords, rtol=0, atol=1e-9))
+
     unittest.main()
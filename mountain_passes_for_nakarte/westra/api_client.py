@@ -0,0 +1,284 @@
+# coding: utf-8
+"""HTTP client for Westra classificator API."""
+
+import gzip
+import http.client
+import json
+import threading
+import time
+import urllib.parse
+from dataclasses import dataclass, field
+from pathlib import Path
+from types import TracebackType
+from typing import Any, NamedTuple
+
+from ..utils import write_bytes_atomic
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+STALE_CONNECTION_ERRORS = (
+    http.client.RemoteDisconnected,
+    ConnectionResetError,
+    BrokenPipeError,
+)
+
+
+class HTTPStatusError(RuntimeError):
+    def __init__(self, status: int):
+        super().__init__(f"Westra API request failed, status {status}")
+        self.status = status
+
+
+class Response(NamedTuple):
+    status: int
+    headers: http.client.HTTPMessage
+    body: bytes
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    # Responses without ETag and Last-Modified, they cannot be revalidated
+    not_cacheable: int = 0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def add_hit(self) -> None:
+        with self._lock:
+            self.hits += 1
+
+    def add_miss(self) -> None:
+        with self._lock:
+            self.misses += 1
+
+    def add_not_cacheable(self) -> None:
+        with self._lock:
+            self.not_cacheable += 1
+
+
+class CacheEntry(NamedTuple):
+    api_host: str
+    etag: str | None
+    last_modified: str | None
+    body: bytes
+
+
+class ResponseCache:
+    """Persistent cache of region responses, one pair of files per region.
+
+    Validators are stored separately from the body and are removed before the
+    body is replaced, so validators never describe a body they were not
+    received with.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.stats = CacheStats()
+
+    def _paths(self, region_id: str) -> tuple[Path, Path]:
+        if not region_id.isdigit():
+            raise ValueError(f"Unexpected region id {region_id!r}")
+        return (
+            self.directory / f"{region_id}.json",
+            self.directory / f"{region_id}.headers.json",
+        )
+
+    def load(self, region_id: str, api_host: str) -> CacheEntry | None:
+        body_path, headers_path = self._paths(region_id)
+        try:
+            with open(headers_path, encoding="utf-8") as f:
+                headers = json.load(f)
+            body = body_path.read_bytes()
+        except FileNotFoundError:
+            return None
+        if headers["api_host"] != api_host:
+            return None
+        return CacheEntry(
+            api_host=api_host,
+            etag=headers["etag"],
+            last_modified=headers["last_modified"],
+            body=body,
+        )
+
+    def store(self, region_id: str, entry: CacheEntry) -> None:
+        body_path, headers_path = self._paths(region_id)
+        headers_path.unlink(missing_ok=True)
+        if entry.etag is None and entry.last_modified is None:
+            self.stats.add_not_cacheable()
+            return
+        write_bytes_atomic(body_path, entry.body)
+        headers = {
+            "api_host": entry.api_host,
+            "etag": entry.etag,
+            "last_modified": entry.last_modified,
+        }
+        write_bytes_atomic(headers_path, json.dumps(headers).encode("utf-8"))
+
+
+class WestraApiClient:  # pylint: disable=too-many-instance-attributes
+    """Fetch region data from Westra API.
+
+    Connections are kept alive and reused, one per thread, so the client can be
+    shared between threads of a pool. Failed requests are retried with
+    exponential backoff while the time budget for the whole run allows.
+    With cache_dir set region responses are cached on disk and revalidated
+    with conditional requests.
+    """
+
+    # pylint: disable-next=too-many-arguments
+    def __init__(
+        self,
+        api_key: str,
+        api_host: str,
+        *,
+        timeout: float = 60,
+        retries: int = 0,
+        retry_backoff: float = 1.0,
+        time_budget: float | None = None,
+        cache_dir: str | None = None,
+    ):
+        url = urllib.parse.urlsplit(api_host)
+        if url.scheme not in ("http", "https"):
+            raise ValueError(f"Unsupported API host {api_host!r}")
+        self.api_key = api_key
+        self.api_host = api_host
+        self.timeout = timeout
+        self.retries = retries
+        self.retry_backoff = retry_backoff
+        self.deadline = None if time_budget is None else time.monotonic() + time_budget
+        self.cache = None if cache_dir is None else ResponseCache(cache_dir)
+        self._scheme = url.scheme
+        self._netloc = url.netloc
+        self._base_path = url.path.rstrip("/")
+        self._local = threading.local()
+        self._connections: list[http.client.HTTPConnection] = []
+        self._connections_lock = threading.Lock()
+
+    def __enter__(self) -> "WestraApiClient":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_val: BaseException | None,
+        exc_tb: TracebackType | None,
+    ) -> None:
+        self.close()
+
+    def close(self) -> None:
+        with self._connections_lock:
+            for connection in self._connections:
+                connection.close()
+            self._connections.clear()
+
+    def region_path(self, region_id: str) -> str:
+        return (
+            f"{self._base_path}/passes/classificator.php"
+            f"?place={region_id}&export=json&key={self.api_key}"
+        )
+
+    def get_region_data(self, region_id: str) -> Any:
+        if self.cache is None:
+            return json.loads(self.get(self.region_path(region_id)))
+        return json.loads(self._get_cached_region_data(region_id))
+
+    def _get_cached_region_data(self, region_id: str) -> bytes:
+        assert self.cache is not None
+        entry = self.cache.load(region_id, self.api_host)
+        headers = {}
+        if entry is not None:
+            if entry.etag is not None:
+                headers["If-None-Match"] = entry.etag
+            if entry.last_modified is not None:
+                headers["If-Modified-Since"] = entry.last_modified
+        response = self.get_response(self.region_path(region_id), headers)
+        if response.status == 304:
+            if entry is None:
+                raise HTTPStatusError(response.status)
+            self.cache.stats.add_hit()
+            return entry.body
+        self.cache.stats.add_miss()
+        self.cache.store(
+            region_id,
+            CacheEntry(
+                api_host=self.api_host,
+                etag=response.headers.get("ETag"),
+                last_modified=response.headers.get("Last-Modified"),
+                body=response.body,
+            ),
+        )
+        return response.body
+
+    def get(self, path: str) -> bytes:
+        return self.get_response(path).body
+
+    def get_response(
+        self, path: str, headers: dict[str, str] | None = None
+    ) -> Response:
+        """Request path with retries, status is either 200 or 304."""
+        attempt = 0
+        while True:
+            self._check_deadline()
+            try:
+                return self._request(path, headers or {})
+            except (OSError, http.client.HTTPException, HTTPStatusError) as exc:
+                if isinstance(exc, HTTPStatusError) and (
+                    exc.status not in RETRY_STATUSES
+                ):
+                    raise
+                if attempt >= self.retries:
+                    raise
+            delay = self.retry_backoff * 2**attempt
+            if self.deadline is not None:
+                delay = min(delay, max(self.deadline - time.monotonic(), 0))
+            time.sleep(delay)
+            attempt += 1
+
+    def _check_deadline(self) -> None:
+        if self.deadline is not None and time.monotonic() >= self.deadline:
+            raise TimeoutError("Time budget for Westra API requests is exhausted")
+
+    def _request(self, path: str, headers: dict[str, str]) -> Response:
+        connection, is_reused = self._get_connection()
+        try:
+            connection.request(
+                "GET", path, headers={"Accept-Encoding": "gzip", **headers}
+            )
+            response = connection.getresponse()
+            body = response.read()
+        except (OSError, http.client.HTTPException) as exc:
+            self._drop_connection()
+            # Server could have closed idle keep-alive connection, this is not
+            # a failure of the request itself.
+            if is_reused and isinstance(exc, STALE_CONNECTION_ERRORS):
+                return self._request(path, headers)
+            raise
+        if response.status == 304 and headers:
+            return Response(response.status, response.headers, b"")
+        if response.status != 200:
+            raise HTTPStatusError(response.status)
+        if response.headers.get("Content-Encoding") == "gzip":
+            body = gzip.decompress(body)
+        return Response(response.status, response.headers, body)
+
+    def _get_connection(self) -> tuple[http.client.HTTPConnection, bool]:
+        connection: http.client.HTTPConnection | None = getattr(
+            self._local, "connection", None
+        )
+        if connection is not None:
+            return connection, True
+        if self._scheme == "https":
+            connection = http.client.HTTPSConnection(self._netloc, timeout=self.timeout)
+        else:
+            connection = http.client.HTTPConnection(self._netloc, timeout=self.timeout)
+        self._local.connection = connection
+        with self._connections_lock:
+            self._connections.append(connection)
+        return connection, False
+
+    def _drop_connection(self) -> None:
+        connection = self._local.connection
+        self._local.connection = None
+        connection.close()
+        with self._connections_lock:
+            self._connections.remove(connection)
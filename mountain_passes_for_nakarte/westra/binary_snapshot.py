@@ -0,0 +1,348 @@
+# coding: utf-8
+"""Binary snapshot of Westra regions tree opened with mmap.
+
+All little-endian, layout:
+    header
+    string offsets, (strings count + 1) * uint64, relative to strings data
+    strings data, UTF-8
+    region records, in depth-first order with children in natural order
+    pass records
+    comment records
+
+Records are of fixed width and consist of uint32 fields. Text fields are
+references to the strings table, MISSING reference stands for absent field.
+Values that do not fit the schema are stored as JSON string in "extras" field.
+"""
+
+import json
+import mmap
+import struct
+from typing import Any, BinaryIO, Iterable, Iterator, Sequence, TextIO, cast
+
+from .compact_tree import (
+    COMMENT_FIELDS,
+    PASS_FIELDS,
+    REPORT_STATS_FIELDS,
+    RegionsStructure,
+)
+from .regions_tree import WestraPass, WestraRegion
+
+MAGIC = b"WSTRTREE"
+VERSION = 1
+MISSING = 0xFFFFFFFF
+NO_PARENT = 0xFFFFFFFF
+
+FLAG_HAS_REPORT_STATS = 1
+FLAG_HAS_COMMENTS = 2
+
+PASS_TEXT_FIELDS = [
+    name for name, kind in PASS_FIELDS.items() if kind not in ("object", "list")
+]
+REPORT_STATS_TEXT_FIELDS = list(REPORT_STATS_FIELDS)
+COMMENT_TEXT_FIELDS = list(COMMENT_FIELDS)
+REGION_TEXT_FIELDS = ["id", "title"]
+
+# magic, version, strings count, regions count, passes count, comments count
+HEADER = struct.Struct("<8sIIIII")
+STRING_OFFSET = struct.Struct("<Q")
+# text fields, extras, parent, first pass, passes count
+REGION_RECORD = struct.Struct(f"<{len(REGION_TEXT_FIELDS)}IIIII")
+# text fields, report stats fields, flags, first comment, comments count, extras
+PASS_RECORD = struct.Struct(
+    f"<{len(PASS_TEXT_FIELDS)}I{len(REPORT_STATS_TEXT_FIELDS)}IIIII"
+)
+# text fields, extras
+COMMENT_RECORD = struct.Struct(f"<{len(COMMENT_TEXT_FIELDS)}II")
+
+
+class _SnapshotWriter:
+    def __init__(self) -> None:
+        self.strings: dict[str, int] = {}
+        self.regions = bytearray()
+        self.passes = bytearray()
+        self.comments = bytearray()
+        self.regions_count = 0
+        self.passes_count = 0
+        self.comments_count = 0
+
+    def add_string(self, s: str) -> int:
+        index = self.strings.get(s)
+        if index is None:
+            index = len(self.strings)
+            self.strings[s] = index
+        return index
+
+    def encode_fields(
+        self, record: dict[str, Any], fields: list[str], extras: dict[str, Any]
+    ) -> list[int]:
+        refs = []
+        for name in fields:
+            value = record.get(name)
+            if isinstance(value, str):
+                refs.append(self.add_string(value))
+            else:
+                refs.append(MISSING)
+                if name in record:
+                    extras[name] = value
+        return refs
+
+    def encode_extras(self, extras: dict[str, Any]) -> int:
+        if not extras:
+            return MISSING
+        return self.add_string(json.dumps(extras, ensure_ascii=False))
+
+    def add_comment(self, comment: dict[str, Any]) -> None:
+        extras = {k: v for k, v in comment.items() if k not in COMMENT_FIELDS}
+        refs = self.encode_fields(comment, COMMENT_TEXT_FIELDS, extras)
+        self.comments += COMMENT_RECORD.pack(*refs, self.encode_extras(extras))
+        self.comments_count += 1
+
+    def add_pass(self, pass_: dict[str, Any]) -> None:
+        extras = {k: v for k, v in pass_.items() if k not in PASS_FIELDS}
+        refs = self.encode_fields(pass_, PASS_TEXT_FIELDS, extras)
+        flags = 0
+        report_stats_refs = [MISSING] * len(REPORT_STATS_TEXT_FIELDS)
+        report_stats = pass_.get("reportStat")
+        if isinstance(report_stats, dict) and all(
+            k in REPORT_STATS_FIELDS and isinstance(v, str)
+            for k, v in report_stats.items()
+        ):
+            flags |= FLAG_HAS_REPORT_STATS
+            report_stats_refs = self.encode_fields(
+                report_stats, REPORT_STATS_TEXT_FIELDS, {}
+            )
+        elif "reportStat" in pass_:
+            extras["reportStat"] = report_stats
+        first_comment = self.comments_count
+        comments = pass_.get("comments")
+        if isinstance(comments, list) and all(isinstance(c, dict) for c in comments):
+            flags |= FLAG_HAS_COMMENTS
+            for comment in comments:
+                self.add_comment(comment)
+        elif "comments" in pass_:
+            extras["comments"] = comments
+        self.passes += PASS_RECORD.pack(
+            *refs,
+            *report_stats_refs,
+            flags,
+            first_comment,
+            self.comments_count - first_comment,
+            self.encode_extras(extras),
+        )
+        self.passes_count += 1
+
+    def add_region(self, region: WestraRegion, parent: int) -> None:
+        region_dict = cast(dict[str, Any], region)
+        extras = {
+            k: v
+            for k, v in region_dict.items()
+            if k not in ("id", "title", "places", "passes")
+        }
+        refs = self.encode_fields(region_dict, REGION_TEXT_FIELDS, extras)
+        first_pass = self.passes_count
+        for pass_ in region["passes"]:
+            self.add_pass(cast(dict[str, Any], pass_))
+        index = self.regions_count
+        self.regions += REGION_RECORD.pack(
+            *refs,
+            self.encode_extras(extras),
+            parent,
+            first_pass,
+            self.passes_count - first_pass,
+        )
+        self.regions_count += 1
+        for child in region["places"]:
+            self.add_region(child, index)
+
+    def write(self, fd: BinaryIO) -> None:
+        fd.write(
+            HEADER.pack(
+                MAGIC,
+                VERSION,
+                len(self.strings),
+                self.regions_count,
+                self.passes_count,
+                self.comments_count,
+            )
+        )
+        encoded_strings = [s.encode("utf-8") for s in self.strings]
+        offset = 0
+        fd.write(STRING_OFFSET.pack(offset))
+        for encoded in encoded_strings:
+            offset += len(encoded)
+            fd.write(STRING_OFFSET.pack(offset))
+        for encoded in encoded_strings:
+            fd.write(encoded)
+        fd.write(self.regions)
+        fd.write(self.passes)
+        fd.write(self.comments)
+
+
+def write_binary_snapshot(
+    fd: BinaryIO, world: WestraRegion, top_level_regions: Iterable[WestraRegion]
+) -> None:
+    """Write snapshot, top-level regions can be provided by generator."""
+    writer = _SnapshotWriter()
+    writer.add_region(cast(WestraRegion, dict(world, places=[])), NO_PARENT)
+    for region in top_level_regions:
+        writer.add_region(region, 0)
+    writer.write(fd)
+
+
+def is_binary_snapshot(filename: str) -> bool:
+    with open(filename, "rb") as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+class BinaryRegionsTree(
+    RegionsStructure
+):  # pylint: disable=too-many-instance-attributes
+    """Regions tree backed by memory-mapped binary snapshot.
+
+    Only regions are decoded on opening, passes are decoded when accessed.
+    """
+
+    def __init__(self, filename: str):
+        super().__init__()
+        with open(filename, "rb") as f:
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        (
+            magic,
+            version,
+            strings_count,
+            regions_count,
+            self.passes_count,
+            self.comments_count,
+        ) = HEADER.unpack_from(self.data, 0)
+        if magic != MAGIC:
+            raise ValueError(f"File {filename!r} is not a binary tree snapshot")
+        if version != VERSION:
+            raise ValueError(f"Unsupported binary snapshot version {version}")
+        self.string_offsets_start = HEADER.size
+        self.strings_start = self.string_offsets_start + STRING_OFFSET.size * (
+            strings_count + 1
+        )
+        strings_size = self._string_offset(strings_count)
+        self.regions_start = self.strings_start + strings_size
+        self.passes_start = self.regions_start + REGION_RECORD.size * regions_count
+        self.comments_start = self.passes_start + PASS_RECORD.size * self.passes_count
+        expected_size = self.comments_start + COMMENT_RECORD.size * self.comments_count
+        if len(self.data) != expected_size:
+            raise ValueError(f"Binary snapshot {filename!r} is truncated or corrupted")
+        self.region_extras: list[dict[str, Any]] = []
+        self._load_regions(regions_count)
+
+    def _load_regions(self, regions_count: int) -> None:
+        for i in range(regions_count):
+            *refs, extras_ref, parent, first_pass, passes_count = (
+                REGION_RECORD.unpack_from(
+                    self.data, self.regions_start + i * REGION_RECORD.size
+                )
+            )
+            region_id, title = (self.get_string(ref) for ref in refs)
+            self.add_region(
+                region_id,
+                title,
+                None if parent == NO_PARENT else parent,
+                range(first_pass, first_pass + passes_count),
+            )
+            self.region_extras.append(self._decode_extras(extras_ref))
+
+    def close(self) -> None:
+        self.data.close()
+
+    def _string_offset(self, index: int) -> int:
+        return cast(
+            int,
+            STRING_OFFSET.unpack_from(
+                self.data, self.string_offsets_start + index * STRING_OFFSET.size
+            )[0],
+        )
+
+    def get_string(self, index: int) -> Any:
+        if index == MISSING:
+            return None
+        start = self.strings_start + self._string_offset(index)
+        end = self.strings_start + self._string_offset(index + 1)
+        return self.data[start:end].decode("utf-8")
+
+    def _decode_extras(self, ref: int) -> dict[str, Any]:
+        if ref == MISSING:
+            return {}
+        return cast(dict[str, Any], json.loads(self.get_string(ref)))
+
+    def _decode_fields(self, fields: list[str], refs: Sequence[int]) -> dict[str, Any]:
+        return {
+            name: self.get_string(ref)
+            for name, ref in zip(fields, refs)
+            if ref != MISSING
+        }
+
+    def _get_comment(self, index: int) -> dict[str, Any]:
+        *refs, extras_ref = COMMENT_RECORD.unpack_from(
+            self.data, self.comments_start + index * COMMENT_RECORD.size
+        )
+        comment = self._decode_fields(COMMENT_TEXT_FIELDS, refs)
+        comment.update(self._decode_extras(extras_ref))
+        return comment
+
+    def get_pass(self, index: int) -> WestraPass:
+        record = PASS_RECORD.unpack_from(
+            self.data, self.passes_start + index * PASS_RECORD.size
+        )
+        fields_count = len(PASS_TEXT_FIELDS)
+        report_stats_end = fields_count + len(REPORT_STATS_TEXT_FIELDS)
+        flags, first_comment, comments_count, extras_ref = record[report_stats_end:]
+        pass_ = self._decode_fields(PASS_TEXT_FIELDS, record[:fields_count])
+        if flags & FLAG_HAS_REPORT_STATS:
+            pass_["reportStat"] = self._decode_fields(
+                REPORT_STATS_TEXT_FIELDS, record[fields_count:report_stats_end]
+            )
+        if flags & FLAG_HAS_COMMENTS:
+            pass_["comments"] = [
+                self._get_comment(i)
+                for i in range(first_comment, first_comment + comments_count)
+            ]
+        pass_.update(self._decode_extras(extras_ref))
+        return cast(WestraPass, pass_)
+
+    def build_region(self, index: int, with_subregions: bool = True) -> WestraRegion:
+        """Decode region with its passes and, optionally, all its subregions."""
+        compact_region = self.regions[index]
+        places = []
+        if with_subregions:
+            places = [self.build_region(child) for child in compact_region.children]
+        region = {
+            "id": compact_region.region_id,
+            "title": compact_region.title,
+            "places": places,
+            "passes": [self.get_pass(i) for i in compact_region.passes_range],
+            **self.region_extras[index],
+        }
+        return cast(WestraRegion, region)
+
+    def iterate_top_level_regions(self) -> Iterator[WestraRegion]:
+        for child in self.regions[0].children:
+            yield self.build_region(child)
+
+    @property
+    def world(self) -> WestraRegion:
+        return self.build_region(0, with_subregions=False)
+
+    def write_json(self, fd: TextIO) -> None:
+        """Write JSON snapshot decoding one top-level region at a time."""
+        fd.write("{")
+        for i, (key, value) in enumerate(cast(dict[str, Any], self.world).items()):
+            if i:
+                fd.write(", ")
+            fd.write(f"{json.dumps(key)}: ")
+            if key != "places":
+                json.dump(value, fd)
+                continue
+            fd.write("[")
+            for j, region in enumerate(self.iterate_top_level_regions()):
+                if j:
+                    fd.write(", ")
+                json.dump(region, fd)
+            fd.write("]")
+        fd.write("}")
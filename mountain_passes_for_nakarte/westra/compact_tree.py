@@ -0,0 +1,400 @@
+# coding: utf-8
+"""Compact in-memory representation of Westra regions tree.
+
+Passes are stored column-wise: numeric fields in typed arrays, string fields as
+indexes in a shared table of unique strings. Passes are converted back to
+WestraPass dicts one at a time during iteration, so code working with
+RegionsTree works with CompactRegionsTree unchanged.
+"""
+
+from abc import ABC, abstractmethod
+from array import array
+from typing import Any, Callable, Iterable, Iterator, cast
+
+from .regions_tree import WestraPass, WestraRegion
+
+COMMENT_FIELDS = {
+    "id": "int",
+    "title": "str",
+    "user_id": "int",
+    "user": "str",
+    "add_time": "str",
+}
+
+REPORT_STATS_FIELDS = {
+    "total": "int",
+    "tech": "int",
+    "photo": "int",
+    "mention": "int",
+    "coord": "int",
+    "first": "int",
+}
+
+PASS_FIELDS = {
+    "id": "int",
+    "tech_type": "str",
+    "title": "str",
+    "other_titles": "str",
+    "is_confirmed": "str",
+    "height": "int",
+    "cat_sum": "str",
+    "cat_win": "str",
+    "cat_spr": "str",
+    "cat_aut": "str",
+    "type_sum": "str",
+    "type_win": "str",
+    "type_spr": "str",
+    "type_aut": "str",
+    "connect": "str",
+    "class_number": "str",
+    "title_class": "str",
+    "height_class": "str",
+    "cat_class": "str",
+    "type_class": "str",
+    "connect_class": "str",
+    "comment_class": "str",
+    "first_asc_class": "str",
+    "user_id": "int",
+    "user_name": "str",
+    "beautyTitle": "str",
+    "latitude": "float",
+    "longitude": "float",
+    "coords_confirm": "str",
+    "reportStat": "object",
+    "comments": "list",
+}
+
+NESTED_FIELDS = {"reportStat": REPORT_STATS_FIELDS, "comments": COMMENT_FIELDS}
+
+
+class StringTable:
+    """Dictionary encoding of strings, index 0 stands for missing value."""
+
+    def __init__(self) -> None:
+        self.strings: list[str | None] = [None]
+        self.indexes: dict[str, int] = {}
+
+    def add(self, s: str | None) -> int:
+        if s is None:
+            return 0
+        index = self.indexes.get(s)
+        if index is None:
+            index = len(self.strings)
+            self.strings.append(s)
+            self.indexes[s] = index
+        return index
+
+    def get(self, index: int) -> str | None:
+        return self.strings[index]
+
+
+class StringColumn:
+    def __init__(self, strings: StringTable):
+        self.strings = strings
+        self.values = array("I")
+
+    def append(self, value: Any) -> bool:
+        if value is not None and not isinstance(value, str):
+            return False
+        self.values.append(self.strings.add(value))
+        return True
+
+    def get(self, row: int) -> str | None:
+        return self.strings.get(self.values[row])
+
+
+class NumberColumn:
+    """Numbers kept as strings in source data.
+
+    Only values which are converted back to exactly same string are stored in
+    array, others (and missing values) are kept as is in exceptions.
+    """
+
+    def __init__(self, typecode: str, parse: Callable[[str], int | float]):
+        self.values = array(typecode)
+        self.parse = parse
+        self.exceptions: dict[int, str | None] = {}
+
+    def append(self, value: Any) -> bool:
+        if value is not None and not isinstance(value, str):
+            return False
+        if value is not None:
+            try:
+                number = self.parse(value)
+                if repr(number) == value:
+                    self.values.append(number)  # type: ignore[arg-type]
+                    return True
+            except (ValueError, OverflowError):
+                pass
+        self.exceptions[len(self.values)] = value
+        self.values.append(0)
+        return True
+
+    def get(self, row: int) -> str | None:
+        if row in self.exceptions:
+            return self.exceptions[row]
+        return repr(self.values[row])
+
+
+class ObjectColumn:
+    """Nested object, one row of child table per parent row."""
+
+    def __init__(self, table: "Table"):
+        self.table = table
+
+    def append(self, value: Any) -> bool:
+        if value is not None and not isinstance(value, dict):
+            return False
+        self.table.append(value)
+        return True
+
+    def get(self, row: int) -> dict[str, Any] | None:
+        return self.table.get(row)
+
+
+class ListColumn:
+    """List of nested objects, rows of child table referenced by offsets."""
+
+    def __init__(self, table: "Table"):
+        self.table = table
+        self.offsets = array("I", [0])
+        self.missing: set[int] = set()
+
+    def append(self, value: Any) -> bool:
+        if value is not None and not (
+            isinstance(value, list) and all(isinstance(item, dict) for item in value)
+        ):
+            return False
+        if value is None:
+            self.missing.add(len(self.offsets) - 1)
+            value = []
+        for item in value:
+            self.table.append(item)
+        self.offsets.append(len(self.table))
+        return True
+
+    def get(self, row: int) -> list[dict[str, Any]] | None:
+        if row in self.missing:
+            return None
+        return [
+            cast(dict[str, Any], self.table.get(i))
+            for i in range(self.offsets[row], self.offsets[row + 1])
+        ]
+
+
+Column = StringColumn | NumberColumn | ObjectColumn | ListColumn
+
+
+class Table:
+    """Rows of dicts with known fields stored column-wise.
+
+    Fields with unexpected value types and unknown fields are kept as is.
+    """
+
+    def __init__(self, fields: dict[str, str], strings: StringTable):
+        self.columns: dict[str, Column] = {}
+        for name, kind in fields.items():
+            column: Column
+            if kind == "str":
+                column = StringColumn(strings)
+            elif kind == "int":
+                column = NumberColumn("q", int)
+            elif kind == "float":
+                column = NumberColumn("d", float)
+            elif kind == "object":
+                column = ObjectColumn(Table(NESTED_FIELDS[name], strings))
+            else:
+                column = ListColumn(Table(NESTED_FIELDS[name], strings))
+            self.columns[name] = column
+        self.rows_count = 0
+        self.missing_rows: set[int] = set()
+        self.extras: dict[int, dict[str, Any]] = {}
+
+    def __len__(self) -> int:
+        return self.rows_count
+
+    def append(self, record: dict[str, Any] | None) -> None:
+        row = self.rows_count
+        if record is None:
+            self.missing_rows.add(row)
+            record = {}
+        extras = {k: v for k, v in record.items() if k not in self.columns}
+        for name, column in self.columns.items():
+            value = record.get(name)
+            if not column.append(value) or (value is None and name in record):
+                if value is not None:
+                    column.append(None)
+                extras[name] = value
+        if extras:
+            self.extras[row] = extras
+        self.rows_count += 1
+
+    def get(self, row: int) -> dict[str, Any] | None:
+        if row in self.missing_rows:
+            return None
+        record = {}
+        for name, column in self.columns.items():
+            value = column.get(row)
+            if value is not None:
+                record[name] = value
+        if row in self.extras:
+            record.update(self.extras[row])
+        return record
+
+
+class CompactRegion:  # pylint: disable=too-few-public-methods
+    __slots__ = ("region_id", "title", "parent", "children", "depth", "passes_range")
+
+    def __init__(
+        self,
+        region_id: str,
+        title: str,
+        parent: int | None,
+        depth: int,
+        passes_range: range,
+    ):
+        self.region_id = region_id
+        self.title = title
+        self.parent = parent
+        self.children: list[int] = []
+        self.depth = depth
+        self.passes_range = passes_range
+
+
+class RegionsStructure(ABC):
+    """Regions without passes, with same iteration interface as RegionsTree.
+
+    Regions in paths yielded by iteration methods are lightweight WestraRegion
+    dicts with empty "places" and "passes", structure of the tree is available
+    through `regions` attribute. Subclasses provide passes by their indexes.
+    """
+
+    def __init__(self) -> None:
+        self.regions: list[CompactRegion] = []
+        self.region_stubs: list[WestraRegion] = []
+        self._stub_indexes: dict[int, int] = {}
+
+    def add_region(
+        self, region_id: str, title: str, parent: int | None, passes_range: range
+    ) -> int:
+        index = len(self.regions)
+        depth = 0
+        if parent is not None:
+            depth = self.regions[parent].depth + 1
+            self.regions[parent].children.append(index)
+        self.regions.append(
+            CompactRegion(
+                region_id=region_id,
+                title=title,
+                parent=parent,
+                depth=depth,
+                passes_range=passes_range,
+            )
+        )
+        stub: WestraRegion = {
+            "id": region_id,
+            "title": title,
+            "places": [],
+            "passes": [],
+        }
+        self.region_stubs.append(stub)
+        self._stub_indexes[id(stub)] = index
+        return index
+
+    def _region_index(self, region: WestraRegion | None) -> int:
+        if region is None:
+            return 0
+        return self._stub_indexes[id(region)]
+
+    @abstractmethod
+    def get_pass(self, index: int) -> WestraPass:
+        """Pass by its index in passes_range of regions."""
+
+    def iterate_regions(
+        self, start_region: WestraRegion | None = None
+    ) -> Iterator[list[WestraRegion]]:
+        """Iterate regions with parents, in same order as RegionsTree."""
+        queue = [[self._region_index(start_region)]]
+        while queue:
+            path = queue.pop()
+            yield [self.region_stubs[i] for i in path]
+            for child in self.regions[path[-1]].children:
+                queue.append(path + [child])
+
+    def _iterate_region_passes(self, region: WestraRegion) -> Iterator[WestraPass]:
+        for pass_index in self.regions[self._region_index(region)].passes_range:
+            yield self.get_pass(pass_index)
+
+    def iterate_regions_with_passes(
+        self,
+    ) -> Iterator[tuple[list[WestraRegion], Iterable[WestraPass]]]:
+        for region_path in self.iterate_regions():
+            yield region_path, self._iterate_region_passes(region_path[-1])
+
+    def iterate_passes(
+        self, region: WestraRegion | None = None
+    ) -> Iterator[tuple[WestraPass, list[WestraRegion]]]:
+        for region_path in self.iterate_regions(region):
+            for pass_ in self._iterate_region_passes(region_path[-1]):
+                yield pass_, region_path
+
+    def list_regions_at_level(self, level: int) -> list[WestraRegion]:
+        indexes = [0]
+        while level:
+            indexes2: list[int] = []
+            for index in indexes:
+                if children := self.regions[index].children:
+                    indexes2.extend(children)
+                else:
+                    indexes2.append(index)
+            indexes = indexes2
+            level -= 1
+        return [self.region_stubs[i] for i in indexes]
+
+    def iterate_regions_at_level(self, level: int) -> Iterator[WestraRegion]:
+        return iter(self.list_regions_at_level(level))
+
+
+class CompactRegionsTree(RegionsStructure):
+    """Regions tree with passes stored column-wise."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.strings = StringTable()
+        self.passes = Table(PASS_FIELDS, self.strings)
+
+    @classmethod
+    def from_tree(cls, tree: WestraRegion) -> "CompactRegionsTree":
+        world = dict(tree, places=[])
+        return cls.from_regions(cast(WestraRegion, world), tree["places"])
+
+    @classmethod
+    def from_regions(
+        cls, world: WestraRegion, top_level_regions: Iterable[WestraRegion]
+    ) -> "CompactRegionsTree":
+        """Build tree from world region and its children.
+
+        Children can be provided one by one by generator, so that only one of
+        them is in memory in the raw form.
+        """
+        compact_tree = cls()
+        compact_tree._add_region(world, None)
+        for region in top_level_regions:
+            compact_tree._add_region(region, 0)
+        return compact_tree
+
+    def _add_region(self, region: WestraRegion, parent: int | None) -> None:
+        passes_start = len(self.passes)
+        for pass_ in region["passes"]:
+            self.passes.append(cast(dict[str, Any], pass_))
+        index = self.add_region(
+            region["id"],
+            region["title"],
+            parent,
+            range(passes_start, len(self.passes)),
+        )
+        for child in region["places"]:
+            self._add_region(child, index)
+
+    def get_pass(self, index: int) -> WestraPass:
+        return cast(WestraPass, self.passes.get(index))
@@ -0,0 +1,52 @@
+# coding: utf-8
+"""Checkpoints of Westra tree download allowing to resume interrupted download."""
+
+import json
+from pathlib import Path
+from typing import Any
+
+from ..utils import write_bytes_atomic
+
+TOP_LEVEL_REGIONS_FILENAME = "top_level_regions.json"
+
+
+class DownloadJournal:
+    """Directory with data of every region saved as soon as it is downloaded."""
+
+    def __init__(self, directory: str, resume: bool = False):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        if not resume:
+            self.clear()
+
+    def clear(self) -> None:
+        (self.directory / TOP_LEVEL_REGIONS_FILENAME).unlink(missing_ok=True)
+        for path in self.directory.glob("region_*.json"):
+            path.unlink()
+
+    def _region_path(self, region_id: str) -> Path:
+        if not region_id.isdigit():
+            raise ValueError(f"Unexpected region id {region_id!r}")
+        return self.directory / f"region_{region_id}.json"
+
+    def _load(self, path: Path) -> Any:
+        try:
+            with open(path, encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def _save(self, path: Path, data: Any) -> None:
+        write_bytes_atomic(path, json.dumps(data).encode("utf-8"))
+
+    def load_top_level_regions(self) -> Any:
+        return self._load(self.directory / TOP_LEVEL_REGIONS_FILENAME)
+
+    def save_top_level_regions(self, data: Any) -> None:
+        self._save(self.directory / TOP_LEVEL_REGIONS_FILENAME, data)
+
+    def load_region(self, region_id: str) -> Any:
+        return self._load(self._region_path(region_id))
+
+    def save_region(self, region_id: str, data: Any) -> None:
+        self._save(self._region_path(region_id), data)
@@ -0,0 +1,192 @@
+# coding: utf-8
+"""Convert Westra regions tree to data for nakarte in a single pass."""
+
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from itertools import groupby
+from typing import Iterable, Iterator, NamedTuple, Protocol, TypedDict
+
+from .normalized_store import NormalizedPassesStore
+from .pass_normalizers import NakartePass, westra_pass_to_nakarte
+from .regions_tree import WestraPass, WestraRegion
+
+REGION_NAMES_LEVELS = (1, 2)
+# Shards submitted to process pool ahead of the one being merged, per worker.
+SHARDS_IN_FLIGHT_PER_JOB = 2
+
+
+class NakarteRegion(TypedDict):
+    name: str
+
+
+class NakarteData(TypedDict):
+    passes: list[NakartePass]
+    regions: dict[str, NakarteRegion]
+
+
+class WestraTree(Protocol):
+    def iterate_regions_with_passes(
+        self,
+    ) -> Iterator[tuple[list[WestraRegion], Iterable[WestraPass]]]: ...
+
+    def iterate_regions_at_level(self, level: int) -> Iterator[WestraRegion]: ...
+
+
+class ConversionResult(NamedTuple):
+    data: NakarteData
+    region_names: list[str]
+
+
+RegionPasses = tuple[list[WestraRegion], list[WestraPass]]
+RegionsWithPasses = Iterable[tuple[list[WestraRegion], Iterable[WestraPass]]]
+NormalizedRegionPasses = tuple[list[WestraRegion], Iterable[NakartePass | None]]
+
+
+def _normalize_shard(shard: list[RegionPasses]) -> list[list[NakartePass | None]]:
+    return [
+        [westra_pass_to_nakarte(westra_pass, region_path) for westra_pass in passes]
+        for region_path, passes in shard
+    ]
+
+
+def _region_stub(region: WestraRegion) -> WestraRegion:
+    return {"id": region["id"], "title": region["title"], "places": [], "passes": []}
+
+
+def _iterate_shards(
+    regions_with_passes: RegionsWithPasses,
+) -> Iterator[list[RegionPasses]]:
+    """Group regions by top-level region, world region is a shard by itself."""
+    shards = groupby(
+        regions_with_passes,
+        key=lambda item: item[0][1]["id"] if len(item[0]) > 1 else None,
+    )
+    for _, shard in shards:
+        yield [(region_path, list(passes)) for region_path, passes in shard]
+
+
+def _normalize_regions_in_pool(
+    regions_with_passes: RegionsWithPasses, jobs: int
+) -> Iterator[NormalizedRegionPasses]:
+    pending: deque[
+        tuple[list[list[WestraRegion]], Future[list[list[NakartePass | None]]]]
+    ]
+    pending = deque()
+
+    def merge_oldest() -> Iterator[NormalizedRegionPasses]:
+        region_paths, future = pending.popleft()
+        yield from zip(region_paths, future.result())
+
+    executor = ProcessPoolExecutor(max_workers=jobs)
+    try:
+        for shard in _iterate_shards(regions_with_passes):
+            # Regions in paths can hold whole subtrees, only ids are needed.
+            payload = [
+                ([_region_stub(region) for region in region_path], passes)
+                for region_path, passes in shard
+            ]
+            future = executor.submit(_normalize_shard, payload)
+            pending.append(([region_path for region_path, _ in shard], future))
+            if len(pending) > jobs * SHARDS_IN_FLIGHT_PER_JOB:
+                yield from merge_oldest()
+        while pending:
+            yield from merge_oldest()
+    finally:
+        executor.shutdown(cancel_futures=True)
+
+
+def _normalize_regions(
+    regions_with_passes: RegionsWithPasses, jobs: int
+) -> Iterator[NormalizedRegionPasses]:
+    if jobs > 1:
+        yield from _normalize_regions_in_pool(regions_with_passes, jobs)
+        return
+    for region_path, region_passes in regions_with_passes:
+        yield region_path, (
+            westra_pass_to_nakarte(westra_pass, region_path)
+            for westra_pass in region_passes
+        )
+
+
+def _normalize_regions_with_store(
+    regions_with_passes: RegionsWithPasses, jobs: int, store: NormalizedPassesStore
+) -> Iterator[NormalizedRegionPasses]:
+    """Normalize only passes missing in store, take others from store."""
+    # Keys of passes of every region and whether pass was found in store, in
+    # the order of iteration.
+    regions_keys: deque[list[tuple[str, bool]]] = deque()
+
+    def iterate_missing_passes() -> Iterator[RegionPasses]:
+        for region_path, region_passes in regions_with_passes:
+            missing_passes = []
+            keys = []
+            for westra_pass in region_passes:
+                key = store.pass_key(westra_pass, region_path)
+                is_stored = key in store
+                if not is_stored:
+                    missing_passes.append(westra_pass)
+                keys.append((key, is_stored))
+            regions_keys.append(keys)
+            yield region_path, missing_passes
+
+    for region_path, normalized_passes in _normalize_regions(
+        iterate_missing_passes(), jobs
+    ):
+        keys = regions_keys.popleft()
+        missing_keys = [key for key, is_stored in keys if not is_stored]
+        normalized = {}
+        for key, nakarte_pass in zip(missing_keys, normalized_passes, strict=True):
+            store.add(key, nakarte_pass)
+            normalized[key] = nakarte_pass
+        yield region_path, [
+            store.get(key) if is_stored else normalized[key] for key, is_stored in keys
+        ]
+
+
+def convert_tree_for_nakarte(
+    tree: WestraTree, jobs: int = 1, store: NormalizedPassesStore | None = None
+) -> ConversionResult:
+    """Normalize every pass once, collecting passes and regions for nakarte.
+
+    Region names are listed for regions of levels 1 and 2 having at least one
+    valid pass.
+
+    With jobs > 1 passes are normalized in worker processes, one top-level
+    region at a time, result is the same as with single process.
+
+    With store only new and changed passes are normalized, store is updated
+    but not saved.
+    """
+    passes = []
+    regions = {}
+    # Regions at each level containing valid passes. Pass in region higher than
+    # the level marks its own region, it has effect only for leaf regions which
+    # are repeated at deeper levels.
+    regions_with_passes: dict[int, set[str]] = {
+        level: set() for level in REGION_NAMES_LEVELS
+    }
+    normalized_regions = (
+        _normalize_regions(tree.iterate_regions_with_passes(), jobs)
+        if store is None
+        else _normalize_regions_with_store(
+            tree.iterate_regions_with_passes(), jobs, store
+        )
+    )
+    for region_path, nakarte_passes in normalized_regions:
+        region = region_path[-1]
+        if region["id"] != "0":
+            regions[region["id"]] = NakarteRegion(name=region["title"])
+        for nakarte_pass in nakarte_passes:
+            if not nakarte_pass:
+                continue
+            passes.append(nakarte_pass)
+            for level, region_ids in regions_with_passes.items():
+                region_ids.add(region_path[min(level, len(region_path) - 1)]["id"])
+
+    region_names = []
+    for level, region_ids in regions_with_passes.items():
+        for region in tree.iterate_regions_at_level(level):
+            if region["id"] in region_ids:
+                region_title = region["title"]
+                region_names.append(f"{level}:{region_title}")
+    return ConversionResult(NakarteData(passes=passes, regions=regions), region_names)
@@ -0,0 +1,75 @@
+# coding: utf-8
+"""Results of passes normalization kept between runs.
+
+Passes are identified by hash of their raw content together with ids of their
+regions, so changed and moved passes are normalized again. STORE_VERSION must
+be incremented when normalization rules change.
+"""
+
+import hashlib
+import json
+from pathlib import Path
+from typing import Any, cast
+
+from ..utils import write_bytes_atomic
+from .pass_normalizers import NakartePass
+from .regions_tree import WestraPass, WestraRegion
+
+STORE_VERSION = 1
+
+
+class NormalizedPassesStore:
+    """Normalized passes of previous run, only passes seen in this run are saved.
+
+    None results (passes without coordinates and test passes) are stored too.
+    """
+
+    def __init__(self, filename: str):
+        self.path = Path(filename)
+        self.previous = self._load()
+        self.current: dict[str, NakartePass | None] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def _load(self) -> dict[str, NakartePass | None]:
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data: Any = json.load(f)
+        except FileNotFoundError:
+            return {}
+        if not isinstance(data, dict) or data.get("version") != STORE_VERSION:
+            return {}
+        passes = cast(dict[str, NakartePass | None], data["passes"])
+        for nakarte_pass in passes.values():
+            if nakarte_pass is not None:
+                lat, lon = nakarte_pass["latlon"]
+                nakarte_pass["latlon"] = (lat, lon)
+        return passes
+
+    @staticmethod
+    def pass_key(westra_pass: WestraPass, region_path: list[WestraRegion]) -> str:
+        content = json.dumps(
+            [westra_pass, [region["id"] for region in region_path]],
+            sort_keys=True,
+            ensure_ascii=False,
+        )
+        return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.current or key in self.previous
+
+    def get(self, key: str) -> NakartePass | None:
+        self.hits += 1
+        if key not in self.current:
+            self.current[key] = self.previous.pop(key)
+        return self.current[key]
+
+    def add(self, key: str, nakarte_pass: NakartePass | None) -> None:
+        self.current[key] = nakarte_pass
+        self.misses += 1
+
+    def save(self) -> None:
+        data = {"version": STORE_VERSION, "passes": self.current}
+        write_bytes_atomic(
+            self.path, json.dumps(data, ensure_ascii=False).encode("utf-8")
+        )
@@ -1,8 +1,9 @@
 # coding: utf-8
 import re
 from enum import StrEnum
+from functools import lru_cache
 from html import unescape
-from typing import Literal, NotRequired, TypedDict
+from typing import Iterable, Literal, NotRequired, TypedDict
 
 from .regions_tree import WestraComment, WestraPass, WestraRegion
 
@@ -32,8 +33,8 @@ class NakartePass(TypedDict):
     regions: list[str]
 
 
-text_chars = re.compile(
-    r'[-"?!+A-Za-z0-9 ,.():;/*~&[\]`%@'
+TEXT_CHARS = (
+    r'-"?!+A-Za-z0-9 ,.():;/*~&[\]`%@'
     + "<>"
     + "\u0400-\u04ff"
     + "\u2116"
@@ -48,33 +49,53 @@ text_chars = re.compile(
     + "\u0301"
     + "\u030a"
     + "\u0100-\u01f7"
-    + "\u00c0-\u00ff°«»'º“”±]"
+    + "\u00c0-\u00ff°«»'º“”±"
 )
 
+text_chars = re.compile(f"[{TEXT_CHARS}]")
+non_text_char = re.compile(f"[^{TEXT_CHARS}]")
+chars_to_replace = re.compile(r"[\r\n\t\xad\xa0]|&amp;|\\'")
 
+SANITIZE_CACHE_SIZE = 1 << 16
+
+
+@lru_cache(maxsize=SANITIZE_CACHE_SIZE)
 def sanitize_text(s: str) -> str | None:
-    s = unescape(unescape(s))
+    """Unescape and normalize text, check that all characters are expected.
+
+    Results are cached, comments and authors names are repeated a lot.
+    """
+    if "&" in s:
+        s = unescape(unescape(s))
     s = s.strip()
     if s == "":
         return None
-    s = (
-        s.replace("\r", " ")
-        .replace("\n", " ")
-        .replace("&amp;", "&")
-        .replace(r"\\'", "'")
-        .replace(r"\'", "'")
-        .replace("\xad", "")  # Soft hyphen
-        .replace("\xa0", " ")  # Non-breaking space
-        .replace("\t", " ")
-    )
-    for i, c in enumerate(s):
-        if not text_chars.match(c):
-            raise ValueError(f"Unexpected character #{i} {c!r} in string {s!r}")
-    s = re.sub(r"\s+", " ", s)
+    if chars_to_replace.search(s):
+        s = (
+            s.replace("\r", " ")
+            .replace("\n", " ")
+            .replace("&amp;", "&")
+            .replace(r"\\'", "'")
+            .replace(r"\'", "'")
+            .replace("\xad", "")  # Soft hyphen
+            .replace("\xa0", " ")  # Non-breaking space
+            .replace("\t", " ")
+        )
+    if m := non_text_char.search(s):
+        i = m.start()
+        c = m.group()
+        raise ValueError(f"Unexpected character #{i} {c!r} in string {s!r}")
+    # Only whitespace character allowed by now is space.
+    if "  " in s:
+        s = re.sub(" +", " ", s)
     s = s.strip()
     return s
 
 
+def sanitize_texts(strings: Iterable[str]) -> list[str | None]:
+    return [sanitize_text(s) for s in strings]
+
+
 class Grade(StrEnum):
     # pylint: disable=invalid-name
     _1a = "1a"
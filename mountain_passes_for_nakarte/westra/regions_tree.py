@@ -1,6 +1,10 @@
 import json
-import urllib.request
-from typing import Iterator, NotRequired, TextIO, TypedDict, cast
+from concurrent.futures import ThreadPoolExecutor
+from functools import cached_property
+from typing import Iterable, Iterator, NotRequired, TextIO, TypedDict, cast
+
+from .api_client import WestraApiClient
+from .download_journal import DownloadJournal
 
 
 class WestraComment(TypedDict):
@@ -61,45 +65,159 @@ class WestraRegion(TypedDict):
     passes: list[WestraPass]
 
 
+def walk_regions(region: WestraRegion) -> Iterator[list[WestraRegion]]:
+    """Iterate regions of subtree with parents, in same order as RegionsTree.
+
+    Unlike RegionsTree no index is built, so subtree is walked once.
+    """
+    queue = [[region]]
+    while queue:
+        region_path = queue.pop()
+        yield region_path
+        for child in region_path[-1]["places"]:
+            queue.append(region_path + [child])
+
+
+def walk_regions_at_level(region: WestraRegion, level: int) -> list[WestraRegion]:
+    """Same regions as RegionsTree.list_regions_at_level, without index."""
+    regions = [region]
+    while level:
+        regions2 = []
+        for region_ in regions:
+            if region_["places"]:
+                regions2.extend(region_["places"])
+            else:
+                regions2.append(region_)
+        regions = regions2
+        level -= 1
+    return regions
+
+
 class RegionsTree:
     default_api_host = "https://westra.ru"
 
     def __init__(self, data: WestraRegion):
         self.tree = data
 
+    @cached_property
+    def index(self) -> "RegionsIndex":
+        """Built on first use, trees that are only stored do not need it."""
+        return RegionsIndex(self.tree)
+
     @classmethod
     def from_file(cls, fd: TextIO) -> "RegionsTree":
         return cls(json.load(fd))
 
     @classmethod
-    def from_remote(cls, api_key: str, api_host: str | None = None) -> "RegionsTree":
+    def from_remote(
+        cls,
+        api_key: str,
+        api_host: str | None = None,
+        *,
+        workers: int = 1,
+        retries: int = 0,
+        time_budget: float | None = None,
+    ) -> "RegionsTree":
+        """Download tree from Westra API.
+
+        With workers > 1 top-level regions are downloaded concurrently, the
+        resulting tree is the same as with sequential download.
+        """
         if api_host is None:
             api_host = cls.default_api_host
-        return cls(cls._download_tree(api_key, api_host))
+        with WestraApiClient(
+            api_key, api_host, retries=retries, time_budget=time_budget
+        ) as client:
+            return cls.from_client(client, workers)
+
+    @classmethod
+    def from_client(
+        cls,
+        client: WestraApiClient,
+        workers: int = 1,
+        journal: DownloadJournal | None = None,
+    ) -> "RegionsTree":
+        """Download tree using client.
+
+        With journal every downloaded region is saved to it, regions already
+        present in journal are not downloaded again.
+        """
+        return cls(cls._download_tree(client, workers, journal))
 
     def save_to_file(self, fd: TextIO) -> None:
         json.dump(self.tree, fd)
 
     @classmethod
     def _get_westra_region_data(
-        cls, region_id: str, api_key: str, api_host: str
+        cls, region_id: str, client: WestraApiClient
+    ) -> WestraRegion:
+        return cast(WestraRegion, client.get_region_data(region_id))
+
+    @classmethod
+    def _get_westra_region_data_with_journal(
+        cls, region_id: str, client: WestraApiClient, journal: DownloadJournal | None
     ) -> WestraRegion:
-        url = f"{api_host}/passes/classificator.php?place={region_id}&export=json&key={api_key}"
-        with urllib.request.urlopen(url, timeout=60) as res:
-            return cast(WestraRegion, json.load(res))
+        if journal is None:
+            return cls._get_westra_region_data(region_id, client)
+        region = cast(WestraRegion | None, journal.load_region(region_id))
+        if region is None:
+            region = cls._get_westra_region_data(region_id, client)
+            journal.save_region(region_id, region)
+        return region
 
     @classmethod
-    def _download_tree(cls, api_key: str, api_host: str) -> WestraRegion:
-        top_level_regions = cast(
-            list[WestraRegion], cls._get_westra_region_data("0", api_key, api_host)
-        )
+    def _download_regions(
+        cls,
+        region_ids: list[str],
+        client: WestraApiClient,
+        workers: int,
+        journal: DownloadJournal | None,
+    ) -> list[WestraRegion]:
+        if workers <= 1:
+            return [
+                cls._get_westra_region_data_with_journal(region_id, client, journal)
+                for region_id in region_ids
+            ]
+        executor = ThreadPoolExecutor(max_workers=workers)
+        try:
+            futures = [
+                executor.submit(
+                    cls._get_westra_region_data_with_journal,
+                    region_id,
+                    client,
+                    journal,
+                )
+                for region_id in region_ids
+            ]
+            return [future.result() for future in futures]
+        finally:
+            executor.shutdown(cancel_futures=True)
+
+    @classmethod
+    def _download_tree(
+        cls,
+        client: WestraApiClient,
+        workers: int = 1,
+        journal: DownloadJournal | None = None,
+    ) -> WestraRegion:
+        top_level_regions = None
+        if journal is not None:
+            top_level_regions = journal.load_top_level_regions()
+        if top_level_regions is None:
+            top_level_regions = cast(
+                list[WestraRegion], cls._get_westra_region_data("0", client)
+            )
+            if journal is not None:
+                journal.save_top_level_regions(top_level_regions)
         assert isinstance(top_level_regions, list)
         return {
             "id": "0",
-            "places": [
-                cls._get_westra_region_data(region["id"], api_key, api_host)
-                for region in top_level_regions
-            ],
+            "places": cls._download_regions(
+                [region["id"] for region in top_level_regions],
+                client,
+                workers,
+                journal,
+            ),
             "title": "World",
             "passes": [],
         }
@@ -107,15 +225,25 @@ class RegionsTree:
     def iterate_regions(
         self, start_region: WestraRegion | None = None
     ) -> Iterator[list[WestraRegion]]:
-        """Iterate regions with parents."""
+        """Iterate regions with parents.
+
+        Paths starting from tree root are shared between calls and must not be
+        modified.
+        """
+        index = self.index
         if start_region is None:
-            start_region = self.tree
-        queue = [[start_region]]
-        while queue:
-            region_path = queue.pop()
-            yield region_path
-            for region in region_path[-1]["places"]:
-                queue.append(region_path + [region])
+            yield from index.paths
+            return
+        position = index.position(start_region)
+        depth = index.depths[position]
+        for i in range(position, index.subtree_ends[position]):
+            yield index.paths[i][depth:]
+
+    def iterate_regions_with_passes(
+        self,
+    ) -> Iterator[tuple[list[WestraRegion], Iterable[WestraPass]]]:
+        for region_path in self.iterate_regions():
+            yield region_path, region_path[-1]["passes"]
 
     def iterate_passes(
         self, region: WestraRegion | None = None
@@ -124,14 +252,98 @@ class RegionsTree:
             yield from ((pass_, region_path) for pass_ in region_path[-1]["passes"])
 
     def list_regions_at_level(self, level: int) -> list[WestraRegion]:
-        regions = [self.tree]
-        while level:
-            regions2 = []
-            for region in regions:
-                if region["places"]:
-                    regions2.extend(region["places"])
+        levels = self.index.levels
+        positions = levels[min(level, len(levels) - 1)]
+        return [self.index.regions[i] for i in positions]
+
+    def iterate_regions_at_level(self, level: int) -> Iterator[WestraRegion]:
+        return iter(self.list_regions_at_level(level))
+
+    def get_region(self, region_id: str) -> WestraRegion:
+        return self.index.regions[self.index.positions_by_id[region_id]]
+
+    def get_parent(self, region: WestraRegion) -> WestraRegion | None:
+        parent = self.index.parents[self.index.position(region)]
+        return None if parent is None else self.index.regions[parent]
+
+    def get_depth(self, region: WestraRegion) -> int:
+        return self.index.depths[self.index.position(region)]
+
+    def count_passes(
+        self, region: WestraRegion, include_subregions: bool = True
+    ) -> int:
+        position = self.index.position(region)
+        if include_subregions:
+            return self.index.subtree_passes_counts[position]
+        return len(region["passes"])
+
+
+class RegionsIndex:  # pylint: disable=too-many-instance-attributes,too-few-public-methods
+    """Structure of regions tree computed once.
+
+    Regions are numbered in the order of iteration (depth-first, children in
+    reverse order), so every subtree occupies a contiguous range of positions.
+    """
+
+    def __init__(self, tree: WestraRegion):
+        self.regions: list[WestraRegion] = []
+        self.paths: list[list[WestraRegion]] = []
+        self.parents: list[int | None] = []
+        self.depths: list[int] = []
+        self.subtree_ends: list[int] = []
+        self.positions_by_object_id: dict[int, int] = {}
+        self.positions_by_id: dict[str, int] = {}
+        queue: list[tuple[list[WestraRegion], int | None]] = [([tree], None)]
+        while queue:
+            region_path, parent = queue.pop()
+            region = region_path[-1]
+            position = len(self.regions)
+            self.regions.append(region)
+            self.paths.append(region_path)
+            self.parents.append(parent)
+            self.depths.append(len(region_path) - 1)
+            self.subtree_ends.append(0)
+            self.positions_by_object_id[id(region)] = position
+            self.positions_by_id.setdefault(region["id"], position)
+            for child in region["places"]:
+                queue.append((region_path + [child], position))
+
+        self.subtree_passes_counts = [len(region["passes"]) for region in self.regions]
+        for position in range(len(self.regions) - 1, -1, -1):
+            children_end = position + 1
+            for child in self.regions[position]["places"]:
+                child_position = self.positions_by_object_id[id(child)]
+                children_end = max(children_end, self.subtree_ends[child_position])
+                self.subtree_passes_counts[position] += self.subtree_passes_counts[
+                    child_position
+                ]
+            self.subtree_ends[position] = children_end
+
+        self.levels = self._build_levels()
+
+    def _build_levels(self) -> list[list[int]]:
+        """Regions at each level, leaf regions are repeated at deeper levels.
+
+        Last list is for all deeper levels.
+        """
+        levels = [[0]]
+        while True:
+            next_level: list[int] = []
+            for position in levels[-1]:
+                if children := self.regions[position]["places"]:
+                    next_level.extend(
+                        self.positions_by_object_id[id(child)] for child in children
+                    )
                 else:
-                    regions2.append(region)
-            regions = regions2
-            level -= 1
-        return regions
+                    next_level.append(position)
+            if next_level == levels[-1]:
+                return levels
+            levels.append(next_level)
+
+    def position(self, region: WestraRegion) -> int:
+        try:
+            return self.positions_by_object_id[id(region)]
+        except KeyError:
+            raise ValueError(
+                f"Region id={region['id']!r} does not belong to the tree"
+            ) from None
@@ -0,0 +1,147 @@
+# coding: utf-8
+"""Find passes located far from other passes of their region.
+
+Footprint of region is alpha shape of its passes. Isolated points are not
+part of alpha shape, so misplaced passes (e.g. with swapped latitude and
+longitude) do not extend footprint of their own region. Every pass is checked
+against footprint of the deepest region in its path having one.
+"""
+
+from typing import TypedDict, cast
+
+import numpy as np
+import numpy.typing as npt
+import shapely
+
+from ..passes_coverage import CONCAVE_ALPHA_METERS, alpha_shape, project_points
+from .pass_normalizers import NakartePass
+
+MISPLACED_DISTANCE_METERS = 100000
+# Regions with fewer passes get no footprint, their passes are checked
+# against parent regions.
+MIN_FOOTPRINT_PASSES = 4
+
+
+class MisplacedPass(TypedDict):
+    id: str
+    latlon: tuple[float, float]
+    regions: list[str]
+    # Region whose footprint pass is checked against
+    footprint_region: str
+    distance_meters: int
+    # Region with the nearest footprint, the deepest one if several contain pass
+    nearest_region: str
+
+
+class SpatialCheckReport(TypedDict):
+    max_distance_meters: int
+    checked_passes: int
+    misplaced_passes: list[MisplacedPass]
+
+
+def region_footprints(
+    passes: list[NakartePass], coords: npt.NDArray[np.float64]
+) -> dict[str, shapely.geometry.base.BaseGeometry]:
+    """Alpha shapes of passes of every region, coords are projected passes."""
+    indexes_by_region: dict[str, list[int]] = {}
+    for i, nakarte_pass in enumerate(passes):
+        for region_id in nakarte_pass["regions"]:
+            indexes_by_region.setdefault(region_id, []).append(i)
+    footprints = {}
+    for region_id, indexes in indexes_by_region.items():
+        if len(indexes) < MIN_FOOTPRINT_PASSES:
+            continue
+        footprint = alpha_shape(coords[indexes], 1.0 / CONCAVE_ALPHA_METERS)
+        # Passes at one point or on a line give hull without area, such
+        # regions are checked against parent regions.
+        if footprint.area > 0:
+            footprints[region_id] = footprint
+    return footprints
+
+
+class RegionFootprints:
+    """Footprints of regions indexed with STRtree."""
+
+    def __init__(self, passes: list[NakartePass], coords: npt.NDArray[np.float64]):
+        footprints = region_footprints(passes, coords)
+        self.regions = list(footprints)
+        self.geometries = np.array(list(footprints.values()), dtype=object)
+        shapely.prepare(self.geometries)
+        self.tree = shapely.STRtree(self.geometries)
+        numbers = {region_id: i for i, region_id in enumerate(self.regions)}
+        # Footprint of the deepest region of every pass having one, or -1
+        self.pass_footprints = np.full(len(passes), -1)
+        depths = {}
+        for i, nakarte_pass in enumerate(passes):
+            for depth, region_id in enumerate(nakarte_pass["regions"]):
+                depths[region_id] = depth
+                if region_id in numbers:
+                    self.pass_footprints[i] = numbers[region_id]
+        self.depths = np.array([depths[region_id] for region_id in self.regions])
+
+    def find_far(
+        self,
+        points: npt.NDArray[np.object_],
+        own_footprints: npt.NDArray[np.int_],
+        distances: npt.NDArray[np.float64],
+    ) -> npt.NDArray[np.int_]:
+        """Indexes of points farther than distances from their own footprints."""
+        point_indexes, footprint_indexes = self.tree.query(
+            points, predicate="dwithin", distance=distances
+        )
+        is_near = np.zeros(len(points), dtype=np.bool_)
+        is_own = footprint_indexes == own_footprints[point_indexes]
+        is_near[point_indexes[is_own]] = True
+        return np.flatnonzero(~is_near)
+
+    def nearest(self, points: npt.NDArray[np.object_]) -> npt.NDArray[np.int_]:
+        """Nearest footprint of every point, the deepest one of equally near."""
+        point_indexes, footprint_indexes = self.tree.query_nearest(
+            points, all_matches=True
+        )
+        # Last match of every point after sorting by point and depth
+        order = np.lexsort((self.depths[footprint_indexes], point_indexes))
+        point_indexes = point_indexes[order]
+        is_last = np.ones(len(order), dtype=np.bool_)
+        is_last[:-1] = point_indexes[1:] != point_indexes[:-1]
+        return np.asarray(footprint_indexes[order][is_last])
+
+
+def check_passes_locations(
+    passes: list[NakartePass], max_distance: int = MISPLACED_DISTANCE_METERS
+) -> SpatialCheckReport:
+    """Find passes farther than max_distance meters from their region footprint.
+
+    Candidates are selected with spatial index of footprints, distances are
+    computed only for them.
+    """
+    lonlats = np.array([p["latlon"] for p in passes], dtype=np.float64).reshape(-1, 2)
+    lonlats = lonlats[:, ::-1]
+    coords = project_points(lonlats)
+    footprints = RegionFootprints(passes, coords)
+    checked = np.flatnonzero(footprints.pass_footprints >= 0)
+    own_footprints = footprints.pass_footprints[checked]
+    points = cast(npt.NDArray[np.object_], shapely.points(coords[checked]))
+    # Web Mercator is stretched by 1 / cos(latitude)
+    scale = np.cos(np.radians(lonlats[checked, 1]))
+
+    far = footprints.find_far(points, own_footprints, max_distance / scale)
+    distances = shapely.distance(
+        points[far], footprints.geometries[own_footprints[far]]
+    ) * (scale[far])
+    nearest = footprints.nearest(points[far])
+    return SpatialCheckReport(
+        max_distance_meters=max_distance,
+        checked_passes=len(checked),
+        misplaced_passes=[
+            MisplacedPass(
+                id=passes[checked[i]]["id"],
+                latlon=passes[checked[i]]["latlon"],
+                regions=passes[checked[i]]["regions"],
+                footprint_region=footprints.regions[own_footprints[i]],
+                distance_meters=round(distance),
+                nearest_region=footprints.regions[nearest_footprint],
+            )
+            for i, distance, nearest_footprint in zip(far, distances, nearest)
+        ],
+    )
@@ -0,0 +1,187 @@
+# coding: utf-8
+"""Walk tree.json snapshot one top-level region at a time.
+
+Only one top-level region is decoded at any moment, so memory usage depends on
+the size of the largest region, not on the size of the whole snapshot.
+"""
+
+import codecs
+import json
+from typing import Any, BinaryIO, Iterable, Iterator, cast
+
+from .regions_tree import (
+    WestraPass,
+    WestraRegion,
+    walk_regions,
+    walk_regions_at_level,
+)
+
+READ_CHUNK_SIZE = 1 << 20
+
+
+class _JsonStreamReader:
+    """Decode JSON values one by one from binary stream keeping byte offsets."""
+
+    def __init__(self, fd: BinaryIO):
+        self.fd = fd
+        self.decoder = json.JSONDecoder()
+        self.text_decoder = codecs.getincrementaldecoder("utf-8")()
+        self.buffer = ""
+        self.pos = 0
+        self.buffer_offset: int = fd.tell()
+        self.eof = False
+
+    @property
+    def offset(self) -> int:
+        """Offset in bytes of current position in stream."""
+        consumed = self.buffer[: self.pos]
+        if consumed.isascii():
+            return self.buffer_offset + len(consumed)
+        return self.buffer_offset + len(consumed.encode("utf-8"))
+
+    def _fill(self, size: int | None = None) -> bool:
+        if self.eof:
+            return False
+        self.buffer_offset = self.offset
+        self.buffer = self.buffer[self.pos :]
+        self.pos = 0
+        # Module constant is read at call time, so that tests can change it.
+        chunk = self.fd.read(READ_CHUNK_SIZE if size is None else size)
+        if not chunk:
+            self.eof = True
+        self.buffer += self.text_decoder.decode(chunk, final=self.eof)
+        return True
+
+    def peek(self) -> str:
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos].isspace():
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._fill():
+                raise ValueError("Unexpected end of JSON stream")
+
+    def expect(self, char: str) -> None:
+        if self.peek() != char:
+            raise ValueError(f"Expected {char!r} at offset {self.offset}")
+        self.pos += 1
+
+    def read_value(self) -> Any:
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                value, end = None, None
+            # Number at the end of buffer can be truncated.
+            if end is not None and (end < len(self.buffer) or self.eof):
+                self.pos = end
+                return value
+            # Grow buffer geometrically to avoid decoding same data many times.
+            if not self._fill(max(READ_CHUNK_SIZE, len(self.buffer) - self.pos)):
+                raise ValueError(f"Invalid JSON value at offset {self.offset}")
+
+    def iterate_object_keys(self) -> Iterator[str]:
+        """Iterate keys of object, value must be consumed before next key."""
+        self.expect("{")
+        if self.peek() == "}":
+            self.pos += 1
+            return
+        while True:
+            key = self.read_value()
+            if not isinstance(key, str):
+                raise ValueError(f"Expected object key at offset {self.offset}")
+            self.expect(":")
+            yield key
+            if self.peek() == "}":
+                self.pos += 1
+                return
+            self.expect(",")
+
+    def iterate_array_items_spans(self) -> Iterator[tuple[int, int]]:
+        """Skip array items returning their offsets and sizes in bytes."""
+        self.expect("[")
+        if self.peek() == "]":
+            self.pos += 1
+            return
+        while True:
+            self.peek()
+            start = self.offset
+            self.read_value()
+            yield start, self.offset - start
+            if self.peek() == "]":
+                self.pos += 1
+                return
+            self.expect(",")
+
+
+class StreamingRegionsTree:
+    """Read-only tree backed by tree.json file, regions are decoded on demand.
+
+    Iteration order and region paths are the same as of RegionsTree, except
+    that the world region in paths has empty "places" list.
+    """
+
+    def __init__(self, filename: str):
+        self.filename = filename
+        self.world: WestraRegion = {
+            "id": "0",
+            "title": "World",
+            "places": [],
+            "passes": [],
+        }
+        self.top_level_spans: list[tuple[int, int]] = []
+        self._scan()
+
+    def _scan(self) -> None:
+        world = cast(dict[str, Any], self.world)
+        with open(self.filename, "rb") as fd:
+            reader = _JsonStreamReader(fd)
+            for key in reader.iterate_object_keys():
+                if key == "places":
+                    self.top_level_spans = list(reader.iterate_array_items_spans())
+                else:
+                    world[key] = reader.read_value()
+
+    def _iterate_top_level_regions(
+        self, spans: list[tuple[int, int]]
+    ) -> Iterator[WestraRegion]:
+        with open(self.filename, "rb") as fd:
+            for offset, size in spans:
+                fd.seek(offset)
+                yield cast(WestraRegion, json.loads(fd.read(size)))
+
+    def iterate_top_level_regions(self) -> Iterator[WestraRegion]:
+        return self._iterate_top_level_regions(self.top_level_spans)
+
+    def iterate_regions(self) -> Iterator[list[WestraRegion]]:
+        """Iterate regions with parents."""
+        yield [self.world]
+        top_level_spans = self.top_level_spans[::-1]
+        for region in self._iterate_top_level_regions(top_level_spans):
+            for region_path in walk_regions(region):
+                yield [self.world] + region_path
+
+    def iterate_regions_with_passes(
+        self,
+    ) -> Iterator[tuple[list[WestraRegion], Iterable[WestraPass]]]:
+        for region_path in self.iterate_regions():
+            yield region_path, region_path[-1]["passes"]
+
+    def iterate_passes(
+        self, region: WestraRegion | None = None
+    ) -> Iterator[tuple[WestraPass, list[WestraRegion]]]:
+        if region is not None:
+            for region_path in walk_regions(region):
+                yield from ((pass_, region_path) for pass_ in region_path[-1]["passes"])
+            return
+        for region_path in self.iterate_regions():
+            yield from ((pass_, region_path) for pass_ in region_path[-1]["passes"])
+
+    def iterate_regions_at_level(self, level: int) -> Iterator[WestraRegion]:
+        """Iterate same regions as RegionsTree.list_regions_at_level."""
+        if level == 0 or not self.top_level_spans:
+            yield self.world
+            return
+        for region in self.iterate_top_level_regions():
+            yield from walk_regions_at_level(region, level - 1)
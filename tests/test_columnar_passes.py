@@ -0,0 +1,51 @@
+# coding: utf-8
+import json
+
+import pytest
+
+from mountain_passes_for_nakarte.columnar_passes import decode_passes, encode_passes
+
+
+def test_columnar_passes_decode_to_passes_file_data():
+    passes_data = {
+        "passes": [
+            {
+                "id": "1",
+                "latlon": (43.1234567, 42.7654321),
+                "regions": ["12", "3"],
+                "comments": [{"user": "A", "content": "x"}, {"content": "y"}],
+                "is_summit": 1,
+            },
+            {"id": "2", "latlon": (-43.5, 170.25), "regions": ["12"]},
+            {
+                "id": "3",
+                "latlon": (43.1234561, 42.7654329),
+                "regions": [],
+                "comments": [],
+                "details": [{"number": "1", "name": "A"}],
+            },
+        ],
+        "regions": {"12": {"name": "Region"}},
+    }
+    encoded = json.loads(json.dumps(encode_passes(passes_data, precision=6)))
+    columns = encoded["passes"]["columns"]
+    assert columns["latlon"]["deltas"] == [
+        43123457,
+        42765432,
+        -86623457,
+        127484568,
+        86623456,
+        -127484567,
+    ]
+    assert columns["regions"]["dictionary"] == ["12", "3"]
+    assert columns["comments"]["records"]["columns"]["user"]["indexes"] == [0, -1]
+
+    expected = json.loads(json.dumps(passes_data))
+    for nakarte_pass in expected["passes"]:
+        nakarte_pass["latlon"] = [round(x, 6) for x in nakarte_pass["latlon"]]
+    assert decode_passes(encoded) == expected
+
+
+def test_decode_passes_rejects_other_data():
+    with pytest.raises(ValueError):
+        decode_passes({"passes": []})
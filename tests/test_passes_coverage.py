@@ -0,0 +1,143 @@
+# coding: utf-8
+import numpy as np
+import pytest
+import shapely
+
+from mountain_passes_for_nakarte.coverage_cache import CoverageCache
+from mountain_passes_for_nakarte.passes_coverage import (
+    CoverageIndex,
+    alpha_shape,
+    boundary_edges,
+    filter_triangles,
+    make_coverage,
+    make_coverage_pyramid,
+    make_regions_coverage,
+    merge_coverages,
+    project_points,
+    raster_coverage,
+    tiled_alpha_shape,
+)
+
+
+def test_boundary_edges():
+    simplices = np.array([[0, 1, 2], [2, 1, 3]])
+    assert boundary_edges(simplices).tolist() == [[0, 1], [0, 2], [1, 3], [2, 3]]
+
+
+def test_filter_triangles_drops_degenerate_triangles():
+    coords = np.array([[0.0, 0.0], [1.0, 0.0], [2.0, 0.0], [0.0, 1.0]])
+    simplices = np.array([[0, 1, 2], [0, 1, 3]])
+    assert filter_triangles(coords, simplices, alpha=0.1).tolist() == [False, True]
+
+
+def test_alpha_shape_of_grid():
+    points = [(float(x), float(y)) for x in range(5) for y in range(5)]
+    assert alpha_shape(points, alpha=0.5).area == 16
+
+
+def test_alpha_shape_fills_area_enclosed_by_triangles():
+    # Two square rings of points, triangles between rings are kept.
+    points = [
+        (float(x), float(y))
+        for x in range(-1, 12)
+        for y in range(-1, 12)
+        if min(x, y) <= 0 or max(x, y) >= 10
+    ]
+    assert alpha_shape(points, alpha=0.5).area == 144
+
+
+def test_make_regions_coverage():
+    rng = np.random.default_rng(0)
+    points = np.concatenate(
+        [rng.normal((40, 43), 0.1, (30, 2)), rng.normal((75, 39), 0.1, (20, 2))]
+    )
+    region_ids = ["2"] * 30 + ["1"] * 20
+    regions_coverage = make_regions_coverage(points, region_ids, jobs=2)
+    assert list(regions_coverage) == ["2", "1"]
+    assert regions_coverage == make_regions_coverage(points, region_ids)
+    coverage = merge_coverages(regions_coverage.values())
+    assert coverage.geom_type == "MultiPolygon"
+    assert coverage.area == pytest.approx(
+        sum(c.area for c in regions_coverage.values())
+    )
+
+
+@pytest.mark.parametrize("engine", ["global", "tiled"])
+def test_make_regions_coverage_of_degenerate_regions(engine):
+    # Coinciding and collinear points can not be triangulated
+    points = [[42, 43]] * 4 + [[44 + i * 0.01, 43 + i * 0.01] for i in range(5)]
+    region_ids = ["1"] * 4 + ["2"] * 5
+    regions_coverage = make_regions_coverage(points, region_ids, engine=engine)
+    for region_id, coverage in regions_coverage.items():
+        region_points = [p for p, r in zip(points, region_ids) if r == region_id]
+        assert coverage.geom_type == "MultiPolygon"
+        assert coverage.contains(shapely.MultiPoint(project_points(region_points)))
+
+
+def test_tiled_alpha_shape_matches_alpha_shape():
+    rng = np.random.default_rng(1)
+    points = np.concatenate(
+        [rng.uniform(0, 40, (300, 2)), rng.normal((20, 20), 1, (100, 2))]
+    )
+    # Duplicates and collinear points in a separate tile
+    points = np.concatenate([points, points[:10], [[100, 100], [101, 101], [102, 102]]])
+    expected = shapely.normalize(alpha_shape(points, alpha=0.5))
+    for jobs in (1, 2):
+        result = tiled_alpha_shape(points, alpha=0.5, tile_size=9, jobs=jobs)
+        assert shapely.normalize(result) == expected
+
+
+def test_tiled_alpha_shape_rebuilds_only_changed_tiles(tmp_path):
+    rng = np.random.default_rng(2)
+    points = rng.uniform(0, 40, (400, 2))
+    cache = CoverageCache(str(tmp_path))
+    tiled_alpha_shape(points, alpha=0.5, tile_size=9, cache=cache)
+    tiles_count = cache.tile_misses
+    cache.save()
+
+    points[0] = [0.5, 0.5]
+    cache = CoverageCache(str(tmp_path))
+    result = tiled_alpha_shape(points, alpha=0.5, tile_size=9, cache=cache)
+    assert shapely.normalize(result) == shapely.normalize(alpha_shape(points, 0.5))
+    assert cache.tile_hits + cache.tile_misses == tiles_count
+    assert 0 < cache.tile_misses <= 8
+
+
+def test_make_coverage_pyramid():
+    rng = np.random.default_rng(3)
+    points = np.concatenate(
+        [rng.uniform((40, 40), (44, 42), (500, 2)), [[50, 50], [60, 45]]]
+    )
+    pyramid = make_coverage_pyramid(points)
+    assert pyramid.coverage == make_coverage(points)
+    vertices = [shapely.get_num_coordinates(band) for band in pyramid.bands.values()]
+    assert vertices == sorted(vertices)
+    # Single points are kept at every zoom
+    for band in pyramid.bands.values():
+        assert band.intersects(pyramid.coverage.geoms[-1].centroid)
+
+
+def test_coverage_index():
+    squares = [
+        [[[10.0, y], [11.0, y], [11.0, y + 1], [10.0, y + 1], [10.0, y]]]
+        for y in (0.0, 60.0)
+    ]
+    index = CoverageIndex({"type": "MultiPolygon", "coordinates": squares})
+    points = np.array([[10.5, 0.5], [11.0, 0.5], [12.0, 0.5], [12.0, 60.5]])
+    assert index.contains(points).tolist() == [True, True, False, False]
+    distance = index.distance(points)
+    assert distance[:2].tolist() == [0, 0]
+    # One degree of longitude
+    assert distance[2] == pytest.approx(111319, rel=1e-3)
+    assert distance[3] == pytest.approx(111319 * np.cos(np.radians(60.5)), rel=1e-3)
+
+
+def test_raster_coverage_contains_dense_points():
+    rng = np.random.default_rng(4)
+    points = project_points(rng.uniform((40, 40), (43, 42), (3000, 2)))
+    coverage = raster_coverage(points)
+    assert coverage.is_valid
+    assert coverage.contains(shapely.points(points)).all()
+    reference = alpha_shape(points, 1 / 20000).buffer(1000)
+    assert coverage.area == pytest.approx(reference.area, rel=0.1)
+    assert make_coverage([[42, 43]], engine="raster").geom_type == "MultiPolygon"
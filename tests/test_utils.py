@@ -0,0 +1,106 @@
+# coding: utf-8
+import gzip
+import io
+import json
+
+import pytest
+
+from mountain_passes_for_nakarte.utils import (
+    iter_json_with_float_precision,
+    open_atomic,
+    remove_stale_files,
+    write_json_with_float_precision,
+)
+
+
+@pytest.mark.parametrize("ensure_ascii", [True, False])
+def test_write_json_with_float_precision(ensure_ascii):
+    data = {
+        "coordinates": [(1.23456789, -2.0), (3, 1e-7)],
+        "name": "Перевал",
+        "values": [None, True, 12345.678949, float("inf")],
+    }
+    fd = io.StringIO()
+    write_json_with_float_precision(data, fd, precision=5, ensure_ascii=ensure_ascii)
+    assert fd.getvalue() == json.dumps(
+        {
+            "coordinates": [[1.23457, -2.0], [3, 0.0]],
+            "name": "Перевал",
+            "values": [None, True, 12345.67895, float("inf")],
+        },
+        ensure_ascii=ensure_ascii,
+    )
+
+
+def round_all_floats(data, precision):
+    if isinstance(data, float):
+        return round(data, precision)
+    if isinstance(data, dict):
+        return {
+            round_all_floats(k, precision): round_all_floats(v, precision)
+            for k, v in data.items()
+        }
+    if isinstance(data, (list, tuple)):
+        return [round_all_floats(x, precision) for x in data]
+    return data
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [{}, {"ensure_ascii": False}, {"sort_keys": True}, {"separators": (",", ":")}],
+)
+def test_iter_json_with_float_precision_matches_json_dumps(kwargs):
+    data = {
+        "Эльбрус": {"высота": 5642.123456, "passes": [{"id": "1", "h": 3.0}, {}]},
+        "nested": [[[1.000001, [2.5e-9, -0.0]], ()], {"a": {"b": [None]}}],
+        # Keys of other types are converted to strings
+        1.23456789: "float key",
+        7: False,
+        True: 1e20,
+        None: 'Перевал \u2603 "quoted"\n',
+    }
+    if kwargs.get("sort_keys"):
+        # Keys of different types can not be sorted
+        data = {str(k): v for k, v in data.items()}
+    encoded = "".join(iter_json_with_float_precision(data, 5, **kwargs))
+    assert encoded == json.dumps(round_all_floats(data, 5), **kwargs)
+
+
+def test_iter_json_with_float_precision_rounds_float_keys():
+    encoded = "".join(iter_json_with_float_precision({0.123456789: 0.987654321}, 5))
+    assert encoded == '{"0.12346": 0.98765}'
+
+
+def test_open_atomic(tmp_path):
+    path = tmp_path / "passes.json"
+    with open_atomic(path, gzip_level=9) as f:
+        f.write("Перевал")
+    compressed = (tmp_path / "passes.json.gz").read_bytes()
+    assert gzip.decompress(compressed).decode() == "Перевал"
+    # No name and zero mtime in header
+    assert compressed[3:8] == bytes(5)
+
+    with pytest.raises(RuntimeError):
+        with open_atomic(path, gzip_level=9) as f:
+            f.write("partial")
+            raise RuntimeError()
+    assert path.read_text(encoding="utf-8") == "Перевал"
+    assert (tmp_path / "passes.json.gz").read_bytes() == compressed
+
+    with open_atomic(path) as f:
+        f.write("new")
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["passes.json"]
+
+
+def test_remove_stale_files(tmp_path):
+    names = ["1.json", "1.json.gz", "2.json", "2.json.gz", "3.json", "index.txt"]
+    names += ["4/5/6.json", "4/7/8.json"]
+    for name in names:
+        (tmp_path / name).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / name).write_text(name, encoding="utf-8")
+    remove_stale_files(tmp_path, "*.json", {tmp_path / "1.json", tmp_path / "3.json"})
+    remove_stale_files(tmp_path, "*/*/*.json", {tmp_path / "4/5/6.json"})
+    assert sorted(
+        str(p.relative_to(tmp_path)) for p in tmp_path.rglob("*") if p.is_file()
+    ) == ["1.json", "1.json.gz", "3.json", "4/5/6.json", "index.txt"]
+    assert not (tmp_path / "4" / "7").exists()
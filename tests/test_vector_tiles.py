@@ -0,0 +1,207 @@
+# coding: utf-8
+import struct
+
+import numpy as np
+import shapely
+
+from mountain_passes_for_nakarte.passes_coverage import make_coverage
+from mountain_passes_for_nakarte.vector_tiles import (
+    encode_points,
+    encode_polygons,
+    make_vector_tiles,
+    to_tile_coords,
+    write_vector_tiles,
+    zigzag,
+)
+from mountain_passes_for_nakarte.webmercator import wgs84_to_web_mercator_array
+
+
+def read_varint(data, pos):
+    result = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        shift += 7
+        if byte < 0x80:
+            return result, pos
+
+
+def read_fields(data):
+    """Fields of protobuf message as (number, value) pairs."""
+    pos = 0
+    while pos < len(data):
+        key, pos = read_varint(data, pos)
+        number, wire_type = key >> 3, key & 7
+        if wire_type == 0:
+            value, pos = read_varint(data, pos)
+        elif wire_type == 1:
+            value, pos = data[pos : pos + 8], pos + 8
+        else:
+            assert wire_type == 2
+            size, pos = read_varint(data, pos)
+            value, pos = data[pos : pos + size], pos + size
+        yield number, value
+
+
+def read_packed(data):
+    numbers, pos = [], 0
+    while pos < len(data):
+        number, pos = read_varint(data, pos)
+        numbers.append(number)
+    return numbers
+
+
+def unzigzag(n):
+    return (n >> 1) ^ -(n & 1)
+
+
+def decode_value(data):
+    ((number, value),) = read_fields(data)
+    return {
+        1: lambda v: v.decode(),
+        3: lambda v: struct.unpack("<d", v)[0],
+        6: unzigzag,
+        7: bool,
+    }[number](value)
+
+
+def decode_geometry(commands):
+    """Rings or points of feature in absolute tile coordinates."""
+    parts, cursor, pos = [], [0, 0], 0
+    while pos < len(commands):
+        command, count = commands[pos] & 7, commands[pos] >> 3
+        pos += 1
+        if command == 7:
+            continue
+        if command == 1:
+            parts.append([])
+        for _ in range(count):
+            cursor = [
+                cursor[0] + unzigzag(commands[pos]),
+                cursor[1] + unzigzag(commands[pos + 1]),
+            ]
+            parts[-1].append(tuple(cursor))
+            pos += 2
+    return parts
+
+
+def decode_tile(data):
+    """Layers of tile by name, features with properties and geometry."""
+    layers = {}
+    for number, layer_data in read_fields(data):
+        assert number == 3
+        layer = {"keys": [], "values": [], "features": []}
+        for field, value in read_fields(layer_data):
+            if field == 1:
+                layer["name"] = value.decode()
+            elif field == 2:
+                layer["features"].append(dict(read_fields(value)))
+            elif field == 3:
+                layer["keys"].append(value.decode())
+            elif field == 4:
+                layer["values"].append(decode_value(value))
+            elif field == 5:
+                layer["extent"] = value
+            elif field == 15:
+                layer["version"] = value
+        layer["features"] = [
+            (
+                feature[3],
+                {
+                    layer["keys"][k]: layer["values"][v]
+                    for k, v in zip(tags[::2], tags[1::2])
+                },
+                decode_geometry(read_packed(feature[4])),
+            )
+            for feature in layer["features"]
+            for tags in [read_packed(feature[2])]
+        ]
+        layers[layer["name"]] = layer
+    return layers
+
+
+def ring_area(ring):
+    """Area by shoelace formula, positive for exterior rings in tile units."""
+    x, y = np.array(ring + ring[:1], dtype=np.float64).T
+    return (x[:-1] * y[1:] - x[1:] * y[:-1]).sum() / 2
+
+
+def test_zigzag():
+    assert [zigzag(n) for n in (0, -1, 1, -2, 2)] == [0, 1, 2, 3, 4]
+
+
+def test_encode_geometry_like_specification_examples():
+    assert encode_points(np.array([[25, 17]])) == [9, 50, 34]
+    assert encode_points(np.array([[5, 7], [3, 2]])) == [17, 10, 14, 3, 9]
+    polygon = shapely.Polygon([(3, 6), (8, 12), (20, 34)])
+    assert encode_polygons([polygon]) == [9, 6, 12, 18, 10, 12, 24, 44, 15]
+
+
+def test_make_vector_tiles():
+    latlons = np.array([[0.001, 0.001], [43.0, 42.0]])
+    properties = [{"name": "A", "elevation": 3000}, {"name": "B", "approx": True}]
+    rng = np.random.default_rng(5)
+    coverage = make_coverage(rng.uniform((42, 42), (44, 43), (200, 2)))
+    tiles = make_vector_tiles(latlons, properties, coverage, max_zoom=2)
+    # Point near the center of the world is within buffer of all tiles of zoom 1
+    assert sorted(key for key in tiles if key[0] == 1) == [
+        (1, 0, 0),
+        (1, 0, 1),
+        (1, 1, 0),
+        (1, 1, 1),
+    ]
+    assert all(b"passes" in data for data in tiles.values())
+    assert b"coverage" in tiles[(0, 0, 0)]
+
+
+def test_vector_tile_round_trip():
+    lonlats = np.array([[42.0, 43.0], [42.5, 43.2]])
+    properties = [
+        {"name": "Перевал", "elevation": 3000, "depth": -150, "approx": True},
+        {"name": "B", "lat": 43.25, "elevation": 1, "approx": False},
+    ]
+    # Square with square hole around the passes
+    square = [(41.0, 42.0), (44.0, 42.0), (44.0, 44.0), (41.0, 44.0)]
+    hole = [(41.5, 42.5), (41.5, 43.5), (43.5, 43.5), (43.5, 42.5)]
+    coverage = shapely.MultiPolygon(
+        [
+            shapely.Polygon(
+                wgs84_to_web_mercator_array(np.array(square)),
+                [wgs84_to_web_mercator_array(np.array(hole))],
+            )
+        ]
+    )
+    key = (5, 19, 11)
+    tiles = make_vector_tiles(lonlats[:, ::-1], properties, coverage, max_zoom=5)
+    layers = decode_tile(tiles[key])
+    assert sorted(layers) == ["coverage", "passes"]
+    for layer in layers.values():
+        assert (layer["version"], layer["extent"]) == (2, 4096)
+
+    passes = layers["passes"]
+    assert passes["keys"] == ["name", "elevation", "depth", "approx", "lat"]
+    # 1 and True are separate values
+    assert passes["values"] == ["Перевал", 3000, -150, True, "B", 43.25, 1, False]
+    assert [feature[1] for feature in passes["features"]] == properties
+    expected = np.round(to_tile_coords(wgs84_to_web_mercator_array(lonlats), key))
+    assert [feature[0] for feature in passes["features"]] == [1, 1]
+    # Points are decoded from deltas to the origin of tile
+    assert [feature[2] for feature in passes["features"]] == [
+        [[tuple(point)]] for point in expected.astype(int).tolist()
+    ]
+
+    ((geometry_type, feature_properties, rings),) = layers["coverage"]["features"]
+    assert (geometry_type, feature_properties) == (3, {})
+    assert len(rings) == 2
+    assert ring_area(rings[0]) > 0
+    assert ring_area(rings[1]) < 0
+
+
+def test_write_vector_tiles_removes_stale_tiles(tmp_path):
+    write_vector_tiles(str(tmp_path), {(0, 0, 0): b"1", (1, 0, 1): b"2"}, 9)
+    write_vector_tiles(str(tmp_path), {(0, 0, 0): b"3"})
+    assert sorted(
+        str(p.relative_to(tmp_path)) for p in tmp_path.rglob("*") if p.is_file()
+    ) == ["0/0/0.pbf"]
+    assert not (tmp_path / "1").exists()
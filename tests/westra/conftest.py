@@ -0,0 +1,127 @@
+# coding: utf-8
+"""Regions tree shared by tests of tree implementations."""
+
+import copy
+import json
+
+import pytest
+
+from mountain_passes_for_nakarte.westra.binary_snapshot import (
+    BinaryRegionsTree,
+    write_binary_snapshot,
+)
+from mountain_passes_for_nakarte.westra.compact_tree import CompactRegionsTree
+from mountain_passes_for_nakarte.westra.regions_tree import RegionsTree
+from mountain_passes_for_nakarte.westra.tree_stream import StreamingRegionsTree
+
+TREE_IMPLEMENTATIONS = ("streaming", "compact", "binary")
+
+
+def _make_region(region_id, places=(), passes=()):
+    return {
+        "id": region_id,
+        "title": f"Хребет {region_id}",
+        "places": list(places),
+        "passes": list(passes),
+    }
+
+
+PASSES = [
+    {
+        "id": "1",
+        "title": "Перевал",
+        "height": "3500",
+        "latitude": "43.123456",
+        "longitude": "42.5",
+        "reportStat": {"total": "2", "tech": "0", "photo": "1"},
+        "comments": [
+            {"id": "5", "title": "Хорошо", "user": "Иван"},
+            {"id": "6", "title": "", "rating": 5},
+        ],
+    },
+    {
+        "id": "2",
+        "title": "Перевал",
+        "height": "",
+        "latitude": "43.10",
+        "longitude": "abc",
+        "comments": [],
+        "unknown_field": [1, 2],
+    },
+    {"id": "007", "title": None, "height": "-150279"},
+    {"id": "4", "title": "Ущелье", "height": None, "comments": "broken"},
+    {"id": "5", "title": "Перевал", "latitude": "43.5", "longitude": "42.1"},
+]
+
+TREE = _make_region(
+    "0",
+    [
+        _make_region("1", [_make_region("11", passes=PASSES[:2]), _make_region("12")]),
+        # Fields of regions other than known ones are kept by binary snapshot
+        dict(_make_region("2", passes=PASSES[2:4]), extra=[1]),
+        _make_region(
+            "3", [_make_region("31", [_make_region("311", passes=PASSES[4:])])]
+        ),
+    ],
+)
+
+
+def _passes_with_paths(tree):
+    return [
+        (pass_, [region["id"] for region in path])
+        for pass_, path in tree.iterate_passes()
+    ]
+
+
+def _regions_at_levels(tree):
+    return [
+        [region["id"] for region in tree.iterate_regions_at_level(level)]
+        for level in range(5)
+    ]
+
+
+@pytest.fixture(name="make_region")
+def fixture_make_region():
+    """Factory of regions with generated titles."""
+    return _make_region
+
+
+@pytest.fixture(name="westra_tree")
+def fixture_westra_tree():
+    return copy.deepcopy(TREE)
+
+
+@pytest.fixture(name="check_same_as_regions_tree")
+def fixture_check_same_as_regions_tree(westra_tree):
+    """Compare passes with paths and regions at levels with RegionsTree."""
+    regions_tree = RegionsTree(westra_tree)
+
+    def check(tree):
+        assert _passes_with_paths(tree) == _passes_with_paths(regions_tree)
+        assert _regions_at_levels(tree) == _regions_at_levels(regions_tree)
+
+    return check
+
+
+def _write_tree(tmp_path, tree, implementation):
+    """Tree implementation built from tree, files are written to tmp_path."""
+    if implementation == "streaming":
+        filename = tmp_path / "tree.json"
+        with open(filename, "w", encoding="utf-8") as f:
+            json.dump(tree, f, ensure_ascii=False)
+        return StreamingRegionsTree(str(filename))
+    if implementation == "compact":
+        return CompactRegionsTree.from_tree(tree)
+    filename = tmp_path / "tree.bin"
+    with open(filename, "wb") as f:
+        write_binary_snapshot(f, tree, tree["places"])
+    return BinaryRegionsTree(str(filename))
+
+
+@pytest.fixture(name="tree_implementation", params=TREE_IMPLEMENTATIONS)
+def fixture_tree_implementation(request, tmp_path, westra_tree):
+    """Every tree implementation built from westra_tree."""
+    tree = _write_tree(tmp_path, westra_tree, request.param)
+    yield tree
+    if isinstance(tree, BinaryRegionsTree):
+        tree.close()
@@ -0,0 +1,113 @@
+# coding: utf-8
+import http.server
+import json
+import threading
+import urllib.parse
+
+import pytest
+
+from mountain_passes_for_nakarte.westra.api_client import WestraApiClient
+from mountain_passes_for_nakarte.westra.download_journal import DownloadJournal
+from mountain_passes_for_nakarte.westra.regions_tree import RegionsTree
+
+REGIONS = {
+    "0": [{"id": "1"}, {"id": "2"}],
+    "1": {"id": "1", "title": "Region 1", "places": [], "passes": []},
+    "2": {"id": "2", "title": "Region 2", "places": [], "passes": []},
+}
+
+
+class WestraHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Statuses returned before the real response, per region
+    failures: dict[str, list[int]] = {}
+    etag: str | None = '"v1"'
+    requests: list[tuple[str, str | None]] = []
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        query = urllib.parse.parse_qs(urllib.parse.urlsplit(self.path).query)
+        region_id = query["place"][0]
+        if_none_match = self.headers.get("If-None-Match")
+        self.requests.append((region_id, if_none_match))
+        failures = self.failures.get(region_id)
+        if failures:
+            self._respond(failures.pop(0), b"")
+        elif self.etag is not None and if_none_match == self.etag:
+            self._respond(304, None)
+        else:
+            self._respond(200, json.dumps(REGIONS[region_id]).encode())
+
+    def _respond(self, status, body):
+        self.send_response(status)
+        if self.etag is not None:
+            self.send_header("ETag", self.etag)
+        if body is not None:
+            self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if body:
+            self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(name="server")
+def fixture_server():
+    WestraHandler.failures = {}
+    WestraHandler.etag = '"v1"'
+    WestraHandler.requests = []
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), WestraHandler)
+    thread = threading.Thread(
+        target=server.serve_forever, kwargs={"poll_interval": 0.01}, daemon=True
+    )
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_retry_after_transient_error(server):
+    WestraHandler.failures = {"1": [503, 502]}
+    with WestraApiClient("key", server, retries=2, retry_backoff=0) as client:
+        assert client.get_region_data("1") == REGIONS["1"]
+    assert [region_id for region_id, _ in WestraHandler.requests] == ["1"] * 3
+
+
+def test_no_retry_after_client_error(server):
+    WestraHandler.failures = {"1": [404]}
+    with WestraApiClient("key", server, retries=2, retry_backoff=0) as client:
+        with pytest.raises(RuntimeError, match="404"):
+            client.get_region_data("1")
+    assert len(WestraHandler.requests) == 1
+
+
+def test_cached_response_is_revalidated(server, tmp_path):
+    for _ in range(2):
+        with WestraApiClient("key", server, cache_dir=str(tmp_path)) as client:
+            assert client.get_region_data("1") == REGIONS["1"]
+    assert WestraHandler.requests == [("1", None), ("1", '"v1"')]
+    assert (client.cache.stats.hits, client.cache.stats.misses) == (1, 0)
+
+
+def test_response_without_validators_is_not_cached(server, tmp_path):
+    WestraHandler.etag = None
+    for _ in range(2):
+        with WestraApiClient("key", server, cache_dir=str(tmp_path)) as client:
+            assert client.get_region_data("1") == REGIONS["1"]
+    assert WestraHandler.requests == [("1", None), ("1", None)]
+    assert client.cache.stats.not_cacheable == 1
+
+
+def test_resume_skips_journaled_regions(server, tmp_path):
+    journal_dir = str(tmp_path)
+    WestraHandler.failures = {"2": [404]}
+    with WestraApiClient("key", server) as client:
+        with pytest.raises(RuntimeError):
+            RegionsTree.from_client(client, journal=DownloadJournal(journal_dir))
+    WestraHandler.requests = []
+    with WestraApiClient("key", server) as client:
+        tree = RegionsTree.from_client(
+            client, journal=DownloadJournal(journal_dir, resume=True)
+        )
+    assert WestraHandler.requests == [("2", None)]
+    assert [region["id"] for region in tree.tree["places"]] == ["1", "2"]
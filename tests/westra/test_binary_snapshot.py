@@ -0,0 +1,19 @@
+# coding: utf-8
+import io
+import json
+
+from mountain_passes_for_nakarte.westra.binary_snapshot import (
+    BinaryRegionsTree,
+    write_binary_snapshot,
+)
+
+
+def test_binary_snapshot_round_trip_to_json(tmp_path, westra_tree):
+    filename = tmp_path / "tree.bin"
+    with open(filename, "wb") as f:
+        write_binary_snapshot(f, westra_tree, westra_tree["places"])
+    binary_tree = BinaryRegionsTree(str(filename))
+    json_file = io.StringIO()
+    binary_tree.write_json(json_file)
+    binary_tree.close()
+    assert json.loads(json_file.getvalue()) == westra_tree
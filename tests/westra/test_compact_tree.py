@@ -0,0 +1,12 @@
+# coding: utf-8
+import pytest
+
+from mountain_passes_for_nakarte.westra.compact_tree import RegionsStructure
+
+
+def test_regions_structure_requires_get_pass():
+    class NoPasses(RegionsStructure):  # pylint: disable=abstract-method
+        pass
+
+    with pytest.raises(TypeError):
+        NoPasses()  # pylint: disable=abstract-class-instantiated
@@ -0,0 +1,67 @@
+# coding: utf-8
+import copy
+
+import pytest
+
+from mountain_passes_for_nakarte.westra.nakartewriter import convert_tree_for_nakarte
+from mountain_passes_for_nakarte.westra.normalized_store import NormalizedPassesStore
+from mountain_passes_for_nakarte.westra.regions_tree import RegionsTree
+
+
+def make_pass(pass_id, title="Перевал"):
+    return {
+        "id": pass_id,
+        "tech_type": "1",
+        "title": title,
+        "other_titles": "",
+        "cat_sum": "1А",
+        "type_sum": "",
+        "connect": "",
+        "user_name": "",
+        "latitude": "43.1",
+        "longitude": "42.5",
+    }
+
+
+@pytest.fixture(name="tree")
+def fixture_tree(make_region):
+    return make_region(
+        "0",
+        [
+            make_region("1", [make_region("11", passes=[make_pass("1")])]),
+            make_region("2", passes=[make_pass("2"), make_pass("3")]),
+            make_region(
+                "3", [make_region("31", [make_region("311", passes=[make_pass("4")])])]
+            ),
+        ],
+    )
+
+
+def test_convert_in_process_pool_matches_single_process(tree):
+    expected = convert_tree_for_nakarte(RegionsTree(tree))
+    assert convert_tree_for_nakarte(RegionsTree(tree), jobs=2) == expected
+    assert [p["id"] for p in expected.data["passes"]] == ["4", "2", "3", "1"]
+
+
+def test_convert_in_process_pool_reports_invalid_pass(make_region):
+    tree = make_region("0", [make_region("1", passes=[make_pass("1", title="{")])])
+    with pytest.raises(ValueError, match="Invalid pass id='1': Unexpected character"):
+        convert_tree_for_nakarte(RegionsTree(tree), jobs=2)
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_convert_with_store_matches_full_conversion(tmp_path, tree, jobs):
+    filename = str(tmp_path / "store.json")
+    store = NormalizedPassesStore(filename)
+    convert_tree_for_nakarte(RegionsTree(tree), jobs=jobs, store=store)
+    store.save()
+
+    tree = copy.deepcopy(tree)
+    tree["places"][1]["passes"][0]["title"] = "Новое название"
+    del tree["places"][1]["passes"][1]
+    store = NormalizedPassesStore(filename)
+    result = convert_tree_for_nakarte(RegionsTree(tree), jobs=jobs, store=store)
+    assert result == convert_tree_for_nakarte(RegionsTree(tree))
+    assert (store.hits, store.misses) == (2, 1)
+    store.save()
+    assert len(NormalizedPassesStore(filename).previous) == 3
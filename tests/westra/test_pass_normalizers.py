@@ -0,0 +1,23 @@
+# coding: utf-8
+import pytest
+
+from mountain_passes_for_nakarte.westra.pass_normalizers import (
+    sanitize_text,
+    sanitize_texts,
+)
+
+
+def test_sanitize_texts():
+    assert sanitize_texts(
+        [
+            "  Перевал &amp;amp; \\'Седло\\'\r\n ",
+            "a\xa0\tb\xadc",
+            " \t ",
+        ]
+    ) == ["Перевал & 'Седло'", "a bc", None]
+
+
+def test_sanitize_text_reports_unexpected_character():
+    with pytest.raises(ValueError) as exc_info:
+        sanitize_text("ab\tc{d")
+    assert str(exc_info.value) == "Unexpected character #4 '{' in string 'ab c{d'"
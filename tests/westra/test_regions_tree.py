@@ -0,0 +1,24 @@
+# coding: utf-8
+from mountain_passes_for_nakarte.westra.regions_tree import (
+    RegionsTree,
+    walk_regions,
+    walk_regions_at_level,
+)
+
+
+def test_tree_implementation_matches_regions_tree(
+    tree_implementation, check_same_as_regions_tree
+):
+    check_same_as_regions_tree(tree_implementation)
+
+
+def test_walk_matches_regions_tree(westra_tree):
+    tree = RegionsTree(westra_tree)
+    assert "index" not in vars(tree)
+    assert [
+        [region["id"] for region in path] for path in walk_regions(westra_tree)
+    ] == [[region["id"] for region in path] for path in tree.iterate_regions()]
+    for level in range(5):
+        assert walk_regions_at_level(westra_tree, level) == (
+            tree.list_regions_at_level(level)
+        )
@@ -0,0 +1,57 @@
+# coding: utf-8
+import pytest
+
+from mountain_passes_for_nakarte.westra.spatial_check import check_passes_locations
+
+
+def make_pass(pass_id, lat, lon, regions):
+    return {
+        "id": pass_id,
+        "grade_eng": "1a",
+        "latlon": (lat, lon),
+        "regions": regions,
+    }
+
+
+def test_check_passes_locations():
+    passes = []
+    for region_id, lon in (("11", 42.0), ("12", 44.0)):
+        for i in range(5):
+            for j in range(5):
+                lat = 43 + i * 0.1
+                passes.append(
+                    make_pass(
+                        f"{region_id}{i}{j}", lat, lon + j * 0.1, ["1", region_id]
+                    )
+                )
+    # Wrong latitude
+    passes.append(make_pass("1", 41.8, 42.2, ["1", "11"]))
+    # Region without own footprint is checked against its parent
+    passes.append(make_pass("2", 43.2, 44.2, ["1", "13"]))
+    passes.append(make_pass("3", 53.2, 44.2, ["1", "13"]))
+    report = check_passes_locations(passes)
+    assert report["checked_passes"] == len(passes)
+    assert [
+        (p["id"], p["footprint_region"], p["nearest_region"])
+        for p in report["misplaced_passes"]
+    ] == [("1", "11", "11"), ("3", "1", "12")]
+    assert report["misplaced_passes"][0]["distance_meters"] == pytest.approx(
+        1.2 * 111319, rel=0.01
+    )
+
+
+def test_check_passes_locations_skips_degenerate_footprints():
+    passes = [
+        make_pass(f"1{i}{j}", 43 + i * 0.1, 42 + j * 0.1, ["1"])
+        for i in range(5)
+        for j in range(5)
+    ]
+    # Passes of region at one point and on a line
+    passes += [make_pass(f"2{i}", 43.2, 42.2, ["1", "2"]) for i in range(4)]
+    passes += [make_pass(f"3{i}", 43.1, 42 + i * 0.1, ["1", "3"]) for i in range(5)]
+    passes.append(make_pass("4", 53.2, 42.2, ["1", "3"]))
+    report = check_passes_locations(passes)
+    assert report["checked_passes"] == len(passes)
+    assert [(p["id"], p["footprint_region"]) for p in report["misplaced_passes"]] == [
+        ("4", "1")
+    ]
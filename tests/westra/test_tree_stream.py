@@ -0,0 +1,26 @@
+# coding: utf-8
+import json
+
+import pytest
+
+from mountain_passes_for_nakarte.westra import tree_stream
+
+
+# Small chunks split multibyte characters and numbers between reads
+@pytest.mark.parametrize("chunk_size", [1, 7, 16])
+@pytest.mark.parametrize("indent", [None, 2])
+# pylint: disable-next=too-many-arguments,too-many-positional-arguments
+def test_streaming_tree_matches_regions_tree(
+    tmp_path, monkeypatch, westra_tree, check_same_as_regions_tree, indent, chunk_size
+):
+    monkeypatch.setattr(tree_stream, "READ_CHUNK_SIZE", chunk_size)
+    filename = tmp_path / "tree.json"
+    with open(filename, "w", encoding="utf-8") as f:
+        json.dump(westra_tree, f, indent=indent, ensure_ascii=False)
+    streaming_tree = tree_stream.StreamingRegionsTree(str(filename))
+    check_same_as_regions_tree(streaming_tree)
+    data = filename.read_bytes()
+    assert [
+        json.loads(data[start : start + size])
+        for start, size in streaming_tree.top_level_spans
+    ] == westra_tree["places"]